@@ -1,45 +1,73 @@
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import time
 import random
-from typing import Dict, List, Optional, Union
+from typing import Collection, Dict, List, Optional, Union
 from pathlib import Path
 import json
+import csv
 import logging
-from urllib.parse import urljoin, urlparse, parse_qsl, urlunparse, urlencode
+from urllib.parse import urljoin, urlsplit, parse_qsl, urlencode
 import re
+from email.utils import parsedate_to_datetime
+import functools
 from fake_useragent import UserAgent
-import pandas as pd
+
+from utils.dns_cache import enable_dns_cache
+
+# 同一URL在爬取过程中会被反复解析，缓存解析结果
+cached_urlsplit = functools.lru_cache(maxsize=4096)(urlsplit)
 
 class WebCrawler:
     """改进型分页爬虫类"""
+
+    # 可重试的状态码与幂等请求方法
+    RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+    IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+    
+    # 固定的请求头部分，只有User-Agent随机
+    _BASE_HEADERS = (
+        ('Accept', 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'),
+        ('Accept-Language', 'zh-CN,zh;q=0.8,en;q=0.6'),
+        ('Connection', 'keep-alive'),
+        ('Upgrade-Insecure-Requests', '1'),
+    )
     
     def __init__(self, 
                  delay: float = 1.0,
                  max_retries: int = 3,
                  timeout: int = 10,
                  use_proxy: bool = False,
-                 proxy_list: Optional[List[str]] = None):
-        """初始化爬虫参数"""
+                 proxy_list: Optional[List[str]] = None,
+                 dns_cache: Optional[float] = None):
+        """初始化爬虫参数，dns_cache 不为None时以其为有效期（秒）启用进程内DNS解析缓存"""
+        if dns_cache is not None:
+            enable_dns_cache(dns_cache)
         self.delay = delay
         self.max_retries = max_retries
         self.timeout = timeout
         self.use_proxy = use_proxy
         self.proxy_list = proxy_list or []
         self.ua = UserAgent()
+        # 预先生成User-Agent池，避免每次请求都访问UserAgent().random
+        self._ua_pool = [self.ua.random for _ in range(256)]
+        
+        # 复用连接池，开启keep-alive
+        self.session = requests.Session()
+        self.session.headers.update(self.get_random_headers())
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=64, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
         self.logger = logging.getLogger(__name__)
 
     def get_random_headers(self) -> Dict[str, str]:
         """随机生成请求头"""
-        return {
-            'User-Agent': self.ua.random,
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.8,en;q=0.6',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        }
+        headers = {'User-Agent': random.choice(self._ua_pool)}
+        headers.update(self._BASE_HEADERS)
+        return headers
 
     def get_random_proxy(self) -> Optional[Dict[str, str]]:
         """随机获取代理"""
@@ -58,7 +86,7 @@ class WebCrawler:
         
         for attempt in range(self.max_retries):
             try:
-                response = requests.request(
+                response = self.session.request(
                     method=method,
                     url=url,
                     params=params,
@@ -71,15 +99,51 @@ class WebCrawler:
                 return response
             except requests.exceptions.RequestException as e:
                 self.logger.warning(f"Request failed (attempt {attempt + 1}/{self.max_retries}): {e}")
-                time.sleep(self.delay * (attempt + 1))
+                if not self._is_retryable(method, e):
+                    return None
+                if attempt < self.max_retries - 1:
+                    time.sleep(self._get_retry_delay(attempt, e.response))
         self.logger.error(f"Max retries reached for URL: {url}")
         return None
 
+    def _is_retryable(self, method: str, error: requests.exceptions.RequestException) -> bool:
+        """判断请求失败后是否值得重试"""
+        idempotent = method.upper() in self.IDEMPOTENT_METHODS
+        response = getattr(error, 'response', None)
+        if response is not None:
+            # 4xx（429除外）重试也不会成功；非幂等请求只在服务端明确拒绝（429/503）时重试
+            status = response.status_code
+            return status in self.RETRY_STATUS_CODES and (idempotent or status in (429, 503))
+        # 非幂等请求只在连接阶段失败时重试，避免重复提交
+        return idempotent or isinstance(error, requests.exceptions.ConnectionError)
+
+    def _get_retry_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """计算重试等待时间：优先遵循Retry-After，否则使用带全抖动的指数退避
+        
+        Retry-After不超过最大退避时间，避免服务端返回过大的值使爬虫长时间挂起。
+        """
+        if response is not None and response.status_code in (429, 503):
+            retry_after = response.headers.get('Retry-After')
+            if retry_after:
+                max_delay = self.delay * (2 ** self.max_retries)
+                if retry_after.isdigit():
+                    return min(float(retry_after), max_delay)
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    return min(max(0.0, retry_at.timestamp() - time.time()), max_delay)
+                except (TypeError, ValueError):
+                    pass
+        return random.uniform(0, self.delay * (2 ** attempt))
+
+    def close(self):
+        """关闭会话，释放连接池"""
+        self.session.close()
+
     def get_soup(self, url: str) -> Optional[BeautifulSoup]:
         """获取BeautifulSoup对象"""
         response = self.make_request(url)
         if response:
-            return BeautifulSoup(response.text, 'html.parser')
+            return BeautifulSoup(response.text, 'lxml')
         return None
 
     def crawl_paginated_data(self,
@@ -89,7 +153,8 @@ class WebCrawler:
                             page_param: Optional[str] = None,
                             max_pages: int = 10,
                             allowed_domains: Optional[List[str]] = None,
-                            exclude_patterns: Optional[List[str]] = None) -> List[Dict]:
+                            exclude_patterns: Optional[List[str]] = None,
+                            fields: Collection[str] = ('text', 'attributes')) -> List[Dict]:
         """分页爬取特定数据
         
         Args:
@@ -100,6 +165,7 @@ class WebCrawler:
             max_pages: 最大爬取页数
             allowed_domains: 允许的域名列表
             exclude_patterns: 排除的URL模式列表
+            fields: 每个元素需要保留的字段，可选 'html', 'text', 'attributes'
             
         Returns:
             爬取的数据列表
@@ -107,8 +173,12 @@ class WebCrawler:
         crawled_data = []
         current_url = start_url
         page_count = 0
-        allowed_domains = allowed_domains or [urlparse(start_url).netloc]
-        exclude_patterns = exclude_patterns or []
+        allowed_domains = allowed_domains or [cached_urlsplit(start_url).netloc]
+        allowed_set = set(allowed_domains)
+        compiled = [re.compile(p) for p in (exclude_patterns or [])]
+        
+        # URL参数分页：首次构造下一页时解析起始URL，之后每页只更新页码
+        page_num = None
         
         while True:
             # 获取当前页面内容
@@ -123,11 +193,7 @@ class WebCrawler:
                 break
             crawled_data.append({
                 'current_url': current_url,
-                'data': [{
-                    'html': str(e),
-                    'text': e.get_text(strip=True),
-                    'attributes': {attr: e[attr] for attr in e.attrs}
-                } for e in data_elements]
+                'data': [self._extract_element(e, fields) for e in data_elements]
             })
             page_count += 1
             self.logger.info(f"Page {page_count} collected successfully")
@@ -146,18 +212,17 @@ class WebCrawler:
                     next_url = urljoin(current_url, next_button['href'])
             elif page_param:
                 # 通过URL参数构造下一页
-                parsed_url = urlparse(current_url)
-                query_params = dict(parse_qsl(parsed_url.query))
-                current_page = int(query_params.get(page_param, 1))
-                query_params[page_param] = str(current_page + 1)
-                next_url = urlunparse((
-                    parsed_url.scheme,
-                    parsed_url.netloc,
-                    parsed_url.path,
-                    parsed_url.params,
-                    urlencode(query_params),
-                    parsed_url.fragment
-                ))
+                if page_num is None:
+                    parsed_start = cached_urlsplit(start_url)
+                    qlist = parse_qsl(parsed_start.query, keep_blank_values=True)
+                    page_idx = next((i for i, (k, _) in enumerate(qlist) if k == page_param), None)
+                    if page_idx is None:
+                        page_idx = len(qlist)
+                        qlist.append((page_param, '1'))
+                    page_num = int(qlist[page_idx][1] or 1)
+                page_num += 1
+                qlist[page_idx] = (page_param, str(page_num))
+                next_url = parsed_start._replace(query=urlencode(qlist)).geturl()
             else:
                 self.logger.info("未提供分页方式")
                 break
@@ -167,10 +232,10 @@ class WebCrawler:
                 break
                 
             # 检查域名和排除模式
-            parsed_next = urlparse(next_url)
-            if any(domain in parsed_next.netloc for domain in allowed_domains):
+            parsed_next = cached_urlsplit(next_url)
+            if parsed_next.netloc in allowed_set:
                 # 排除模式检查
-                if not any(re.search(pattern, next_url) for pattern in exclude_patterns):
+                if not any(p.search(next_url) for p in compiled):
                     current_url = next_url
                     time.sleep(self.delay)
                 else:
@@ -182,11 +247,30 @@ class WebCrawler:
                 
         return crawled_data
 
+    def _extract_element(self, e, fields: Collection[str]) -> Dict:
+        """按需提取元素字段，未请求的字段（尤其是HTML序列化）不做计算"""
+        element = {}
+        if 'html' in fields:
+            element['html'] = str(e)
+        if 'text' in fields:
+            element['text'] = e.get_text(strip=True)
+        if 'attributes' in fields:
+            element['attributes'] = dict(e.attrs)
+        return element
+
     def save_results(self,
                     data: List[Dict],
                     output_dir: Union[str, Path],
-                    format: str = 'json'):
-        """保存爬取结果"""
+                    format: str = 'json',
+                    fieldnames: Optional[List[str]] = None):
+        """保存爬取结果
+        
+        Args:
+            data: 爬取结果列表
+            output_dir: 输出目录
+            format: 输出格式，支持 'json', 'jsonl', 'csv'
+            fieldnames: CSV列名，为None时根据数据自动推断
+        """
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
         timestamp = time.strftime('%Y%m%d_%H%M%S')
@@ -195,23 +279,43 @@ class WebCrawler:
             output_file = output_dir / f'crawl_results_{timestamp}.json'
             with open(output_file, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
+        elif format == 'jsonl':
+            # 每个元素一行，逐行写入
+            output_file = output_dir / f'crawl_results_{timestamp}.jsonl'
+            with open(output_file, 'w', encoding='utf-8') as f:
+                for page in data:
+                    for element in page['data']:
+                        f.write(json.dumps({'current_url': page['current_url'], **element},
+                                           ensure_ascii=False))
+                        f.write('\n')
         elif format == 'csv':
-            # 转换为适合CSV的格式
-            csv_rows = []
-            for page in data:
-                for element in page['data']:
-                    row = {
-                        'URL': page['current_url'],
-                        'Text Content': element['text'],
-                        'HTML Content': element['html']
-                    }
-                    row.update(element['attributes'])  # 添加元素属性
-                    csv_rows.append(row)
+            # 先轻量扫描一遍确定列名，再逐行写入，避免在内存中构造全部行
+            if fieldnames is None:
+                columns = dict.fromkeys(['URL'])
+                for page in data:
+                    for element in page['data']:
+                        if 'text' in element:
+                            columns['Text Content'] = None
+                        if 'html' in element:
+                            columns['HTML Content'] = None
+                        columns.update(dict.fromkeys(element.get('attributes', ())))
+                fieldnames = list(columns)
                     
             output_file = output_dir / f'crawl_results_{timestamp}.csv'
-            pd.DataFrame(csv_rows).to_csv(output_file, index=False)
+            with open(output_file, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+                writer.writeheader()
+                for page in data:
+                    for element in page['data']:
+                        row = {'URL': page['current_url']}
+                        if 'text' in element:
+                            row['Text Content'] = element['text']
+                        if 'html' in element:
+                            row['HTML Content'] = element['html']
+                        row.update(element.get('attributes', {}))  # 添加元素属性
+                        writer.writerow(row)
         else:
-            raise ValueError("支持的格式：json 或 csv")
+            raise ValueError("支持的格式：json、jsonl 或 csv")
         
         self.logger.info(f"数据已保存到 {output_file}")
 
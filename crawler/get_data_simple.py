@@ -1,32 +1,52 @@
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
+import asyncio
 
-import time
+import aiohttp
+import pandas as pd
+from selectolax.lexbor import LexborHTMLParser
 
 url = "http://47.117.41.252:33200/index.php?controller=product&action=detail&id="
-user_lst = []
+ids, names, phones, comments = [], [], [], []
+concurrency = 50
+field_classes = ("user-id", "reviewer-name", "reviewer-phone", "review-content")
+field_selector = ", ".join("." + cls for cls in field_classes)
 
-def get_data(id):
-    r = requests.get(url + str(id))
-    soup = BeautifulSoup(r.text, 'html.parser')
-    comment = soup.select("body > main > section.product-reviews > div > div")
+def parse_data(text):
+    tree = LexborHTMLParser(text)
+    comment = tree.css("body > main > section.product-reviews > div > div")
     for c in comment:
-        s = BeautifulSoup(str(c), 'html.parser')
-        user_id = int(s.select_one(".user-id").text.split("：")[1])
-        user_name = s.select_one(".reviewer-name").text.split("：")[1]
-        user_phone = s.select_one(".reviewer-phone").text.split("：")[1]
-        user_comment = s.select_one(".review-content").text.strip()
-        user_lst.append([user_id, user_name, user_phone, user_comment])
-        time.sleep(0.5)
+        # 一次遍历取出四个字段节点，按class归类（每类取第一个）
+        kids = {}
+        for node in c.css(field_selector):
+            for cls in node.attributes.get("class", "").split():
+                if cls in field_classes:
+                    kids.setdefault(cls, node)
+        user_id = int(kids["user-id"].text().split("：")[1])
+        user_name = kids["reviewer-name"].text().split("：")[1]
+        user_phone = kids["reviewer-phone"].text().split("：")[1]
+        user_comment = kids["review-content"].text().strip()
+        ids.append(user_id)
+        names.append(user_name)
+        phones.append(user_phone)
+        comments.append(user_comment)
 
-for i in range(1, 501):
+async def get_data(sem, session, id):
     try:
-        get_data(i)
+        async with sem:
+            async with session.get(url + str(id)) as r:
+                text = await r.text()
+        parse_data(text)
     except Exception as e:
-        print(i)
+        print(id)
         print(e)
 
-df = pd.DataFrame(user_lst, columns=["user_id", "user_name", "user_phone", "user_comment"]).sort_values(by="user_id")
+async def main():
+    sem = asyncio.Semaphore(concurrency)
+    conn = aiohttp.TCPConnector(limit=100, limit_per_host=concurrency, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=conn) as session:
+        await asyncio.gather(*(get_data(sem, session, i) for i in range(1, 501)))
+
+asyncio.run(main())
+
+df = pd.DataFrame({"user_id": ids, "user_name": names, "user_phone": phones, "user_comment": comments}).sort_values(by="user_id")
 print(df.head())
 df.to_csv("task1.csv", index=False)
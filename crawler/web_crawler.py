@@ -1,4 +1,7 @@
+import asyncio
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import time
 import random
@@ -6,20 +9,45 @@ from typing import Dict, List, Optional, Union
 from pathlib import Path
 import json
 import logging
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin, urlsplit
 import re
+from email.utils import parsedate_to_datetime
+import functools
+from collections import deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import threading
 from fake_useragent import UserAgent
 import pandas as pd
 
+from utils.dns_cache import enable_dns_cache
+
+# 同一URL在爬取过程中会被反复解析，缓存解析结果
+cached_urlsplit = functools.lru_cache(maxsize=4096)(urlsplit)
+# 站内导航链接在各页面间大量重复，缓存相对URL的拼接结果
+cached_urljoin = functools.lru_cache(maxsize=16384)(urljoin)
+
 class WebCrawler:
     """网页爬虫类"""
     
+    # 可重试的状态码与幂等请求方法
+    RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+    IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+    
+    # 固定的请求头部分，只有User-Agent随机
+    _BASE_HEADERS = (
+        ('Accept', 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'),
+        ('Accept-Language', 'zh-CN,zh;q=0.8,en;q=0.6'),
+        ('Connection', 'keep-alive'),
+        ('Upgrade-Insecure-Requests', '1'),
+    )
+    
     def __init__(self, 
                  delay: float = 1.0,
                  max_retries: int = 3,
                  timeout: int = 10,
                  use_proxy: bool = False,
-                 proxy_list: Optional[List[str]] = None):
+                 proxy_list: Optional[List[str]] = None,
+                 dns_cache: Optional[float] = None):
         """初始化爬虫
         
         Args:
@@ -28,13 +56,28 @@ class WebCrawler:
             timeout: 请求超时时间（秒）
             use_proxy: 是否使用代理
             proxy_list: 代理列表
+            dns_cache: 进程内DNS解析缓存的有效期（秒），为None时不启用，见 utils.dns_cache
         """
+        if dns_cache is not None:
+            enable_dns_cache(dns_cache)
         self.delay = delay
         self.max_retries = max_retries
         self.timeout = timeout
         self.use_proxy = use_proxy
         self.proxy_list = proxy_list or []
         self.ua = UserAgent()
+        # 预先生成User-Agent池，避免每次请求都访问UserAgent().random
+        self._ua_pool = [self.ua.random for _ in range(256)]
+        
+        # 复用连接池，开启keep-alive
+        self.session = requests.Session()
+        self.session.headers.update(self.get_random_headers())
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=64, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # 异步客户端（HTTP/2多路复用），首次使用时创建
+        self._aclient: Optional[httpx.AsyncClient] = None
         
         # 配置日志
         logging.basicConfig(
@@ -45,13 +88,9 @@ class WebCrawler:
     
     def get_random_headers(self) -> Dict[str, str]:
         """获取随机请求头"""
-        return {
-            'User-Agent': self.ua.random,
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.8,en;q=0.6',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        }
+        headers = {'User-Agent': random.choice(self._ua_pool)}
+        headers.update(self._BASE_HEADERS)
+        return headers
     
     def get_random_proxy(self) -> Optional[Dict[str, str]]:
         """获取随机代理"""
@@ -86,7 +125,7 @@ class WebCrawler:
         
         for attempt in range(self.max_retries):
             try:
-                response = requests.request(
+                response = self.session.request(
                     method=method,
                     url=url,
                     params=params,
@@ -99,17 +138,54 @@ class WebCrawler:
                 return response
             except requests.exceptions.RequestException as e:
                 self.logger.warning(f"Request failed (attempt {attempt + 1}/{self.max_retries}): {e}")
+                if not self._is_retryable(method, e):
+                    return None
                 if attempt < self.max_retries - 1:
-                    time.sleep(self.delay * (attempt + 1))
+                    time.sleep(self._get_retry_delay(attempt, e.response))
                 else:
                     self.logger.error(f"Max retries reached for URL: {url}")
                     return None
     
-    def crawl_page(self, url: str) -> Optional[Dict]:
+    def close(self):
+        """关闭会话，释放连接池"""
+        self.session.close()
+    
+    def _is_retryable(self, method: str, error: requests.exceptions.RequestException) -> bool:
+        """判断请求失败后是否值得重试"""
+        idempotent = method.upper() in self.IDEMPOTENT_METHODS
+        response = getattr(error, 'response', None)
+        if response is not None:
+            # 4xx（429除外）重试也不会成功；非幂等请求只在服务端明确拒绝（429/503）时重试
+            status = response.status_code
+            return status in self.RETRY_STATUS_CODES and (idempotent or status in (429, 503))
+        # 非幂等请求只在连接阶段失败时重试，避免重复提交
+        return idempotent or isinstance(error, requests.exceptions.ConnectionError)
+    
+    def _get_retry_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """计算重试等待时间：优先遵循Retry-After，否则使用带全抖动的指数退避
+        
+        Retry-After不超过最大退避时间，避免服务端返回过大的值使爬虫长时间挂起。
+        """
+        if response is not None and response.status_code in (429, 503):
+            retry_after = response.headers.get('Retry-After')
+            if retry_after:
+                max_delay = self.delay * (2 ** self.max_retries)
+                if retry_after.isdigit():
+                    return min(float(retry_after), max_delay)
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    return min(max(0.0, retry_at.timestamp() - time.time()), max_delay)
+                except (TypeError, ValueError):
+                    pass
+        return random.uniform(0, self.delay * (2 ** attempt))
+    
+    def crawl_page(self, url: str, extract_text: bool = False, extract_meta: bool = False) -> Optional[Dict]:
         """爬取单个页面
         
         Args:
             url: 页面URL
+            extract_text: 是否提取页面全文，不提取时 'text' 为None
+            extract_meta: 是否提取meta标签，不提取时 'meta' 为None
             
         Returns:
             页面内容字典
@@ -118,93 +194,262 @@ class WebCrawler:
         if not response:
             return None
         
+        return self._parse_page(url, response, extract_text, extract_meta)
+    
+    def _parse_page(self, url: str, response, extract_text: bool = False,
+                    extract_meta: bool = False) -> Optional[Dict]:
+        """解析页面响应（requests与httpx的响应对象均可）
+        
+        Args:
+            url: 页面URL
+            response: 响应对象
+            extract_text: 是否提取页面全文
+            extract_meta: 是否提取meta标签
+            
+        Returns:
+            页面内容字典
+        """
         try:
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = BeautifulSoup(response.text, 'lxml')
             
             # 提取页面信息
             page_info = {
                 'url': url,
                 'title': soup.title.string if soup.title else '',
-                'text': soup.get_text(),
-                'links': [a.get('href') for a in soup.find_all('a', href=True)],
-                'images': [img.get('src') for img in soup.find_all('img', src=True)],
+                'text': soup.get_text() if extract_text else None,
+                # 直接拼接为绝对URL
+                'links': [cached_urljoin(url, a['href']) for a in soup.find_all('a', href=True)],
+                'images': [cached_urljoin(url, img['src']) for img in soup.find_all('img', src=True)],
                 'meta': {meta.get('name', ''): meta.get('content', '') 
-                        for meta in soup.find_all('meta')},
+                        for meta in soup.find_all('meta')} if extract_meta else None,
                 'status_code': response.status_code,
                 'headers': dict(response.headers)
             }
             
-            # 处理相对URL
-            page_info['links'] = [urljoin(url, link) for link in page_info['links']]
-            page_info['images'] = [urljoin(url, img) for img in page_info['images']]
-            
             return page_info
         except Exception as e:
             self.logger.error(f"Error parsing page {url}: {e}")
             return None
     
+    def _build_filters(self,
+                       start_url: str,
+                       allowed_domains: Optional[List[str]],
+                       exclude_patterns: Optional[List[str]]):
+        """构造域名白名单集合与预编译的排除模式"""
+        # 设置允许的域名
+        if allowed_domains is None:
+            allowed_domains = [cached_urlsplit(start_url).netloc]
+        allowed_set = set(allowed_domains)
+        
+        # 设置排除模式
+        if exclude_patterns is None:
+            exclude_patterns = [
+                r'\.(jpg|jpeg|png|gif|pdf|doc|docx|xls|xlsx)$',
+                r'\.(css|js)$',
+                r'#.*$'
+            ]
+        compiled = [re.compile(p) for p in exclude_patterns]
+        return allowed_set, compiled
+    
+    def _filter_links(self, links: List[str], seen: set, allowed_set: set, compiled: List) -> List[str]:
+        """过滤新发现的链接，返回需要入队的链接（被拒绝的链接同样记入seen）"""
+        new_links = []
+        for link in links:
+            if link in seen:
+                continue
+            seen.add(link)
+            # 检查URL是否在允许的域名内
+            if cached_urlsplit(link).netloc not in allowed_set:
+                continue
+            # 检查URL是否匹配排除模式
+            if any(p.search(link) for p in compiled):
+                continue
+            new_links.append(link)
+        return new_links
+    
     def crawl_site(self, 
                   start_url: str,
                   max_pages: int = 100,
                   allowed_domains: Optional[List[str]] = None,
-                  exclude_patterns: Optional[List[str]] = None) -> List[Dict]:
-        """爬取整个网站
+                  exclude_patterns: Optional[List[str]] = None,
+                  max_workers: int = 16,
+                  max_per_host: int = 4,
+                  extract_text: bool = False,
+                  extract_meta: bool = False) -> List[Dict]:
+        """爬取整个网站（多线程并发）
         
         Args:
             start_url: 起始URL
             max_pages: 最大爬取页面数
             allowed_domains: 允许的域名列表
             exclude_patterns: 排除的URL模式列表
+            max_workers: 并发线程数
+            max_per_host: 同一主机的最大并发请求数
+            extract_text: 是否提取页面全文
+            extract_meta: 是否提取meta标签
             
         Returns:
             爬取的页面列表
         """
-        visited_urls = set()
-        pages_to_visit = {start_url}
+        # 待爬队列（BFS）与已见集合，链接在入队时完成过滤，被拒绝的链接也不再重复检查
+        frontier = deque([start_url])
+        seen = {start_url}
         crawled_pages = []
         
-        # 设置允许的域名
-        if allowed_domains is None:
-            allowed_domains = [urlparse(start_url).netloc]
+        allowed_set, compiled = self._build_filters(start_url, allowed_domains, exclude_patterns)
         
-        # 设置排除模式
-        if exclude_patterns is None:
-            exclude_patterns = [
-                r'\.(jpg|jpeg|png|gif|pdf|doc|docx|xls|xlsx)$',
-                r'\.(css|js)$',
-                r'#.*$'
-            ]
+        # 按主机限流：限制并发数，且同一主机相邻两次请求的间隔不小于self.delay
+        host_slots = defaultdict(lambda: threading.Semaphore(max_per_host))
+        host_next_time = {}
+        host_lock = threading.Lock()
         
-        while pages_to_visit and len(crawled_pages) < max_pages:
-            url = pages_to_visit.pop()
-            
-            # 检查URL是否已访问
-            if url in visited_urls:
-                continue
+        def fetch(url: str, slot: threading.Semaphore) -> Optional[Dict]:
+            host = cached_urlsplit(url).netloc
+            with slot:
+                with host_lock:
+                    now = time.monotonic()
+                    start_at = max(now, host_next_time.get(host, now))
+                    host_next_time[host] = start_at + self.delay
+                time.sleep(start_at - now)
+                self.logger.info(f"Crawling: {url}")
+                return self.crawl_page(url, extract_text, extract_meta)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            in_flight = set()
+            while (frontier or in_flight) and len(crawled_pages) < max_pages:
+                # 补充任务，保证已完成与进行中的页面数不超过上限
+                while frontier and len(in_flight) < max_workers and \
+                        len(crawled_pages) + len(in_flight) < max_pages:
+                    url = frontier.popleft()
+                    slot = host_slots[cached_urlsplit(url).netloc]
+                    in_flight.add(executor.submit(fetch, url, slot))
+                
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page_info = future.result()
+                    if page_info:
+                        crawled_pages.append(page_info)
+                        
+                        # 添加新发现的链接
+                        frontier.extend(self._filter_links(page_info['links'], seen, allowed_set, compiled))
+        
+        return crawled_pages
+    
+    def _get_aclient(self) -> httpx.AsyncClient:
+        """获取（必要时创建）异步HTTP客户端"""
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+                timeout=self.timeout,
+                follow_redirects=True
+            )
+        return self._aclient
+    
+    async def aclose(self):
+        """关闭异步客户端"""
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+    
+    async def amake_request(self, url: str, method: str = 'GET') -> Optional[httpx.Response]:
+        """异步发送HTTP请求（不支持代理）
+        
+        Args:
+            url: 请求URL
+            method: 请求方法
             
-            # 检查URL是否在允许的域名内
-            if not any(domain in url for domain in allowed_domains):
-                continue
+        Returns:
+            响应对象
+        """
+        client = self._get_aclient()
+        for attempt in range(self.max_retries):
+            try:
+                response = await client.request(method, url, headers=self.get_random_headers())
+                response.raise_for_status()
+                return response
+            except httpx.HTTPError as e:
+                self.logger.warning(f"Request failed (attempt {attempt + 1}/{self.max_retries}): {e}")
+                response = getattr(e, 'response', None)
+                if response is not None and response.status_code not in self.RETRY_STATUS_CODES:
+                    return None
+                if attempt < self.max_retries - 1:
+                    await asyncio.sleep(self._get_retry_delay(attempt, response))
+        self.logger.error(f"Max retries reached for URL: {url}")
+        return None
+    
+    async def acrawl_page(self, url: str, fetch_resources: bool = False,
+                          extract_text: bool = False, extract_meta: bool = False) -> Optional[Dict]:
+        """异步爬取单个页面
+        
+        Args:
+            url: 页面URL
+            fetch_resources: 是否并发发送HEAD请求获取图片资源的元数据
+            extract_text: 是否提取页面全文
+            extract_meta: 是否提取meta标签
             
-            # 检查URL是否匹配排除模式
-            if any(re.search(pattern, url) for pattern in exclude_patterns):
-                continue
+        Returns:
+            页面内容字典
+        """
+        response = await self.amake_request(url)
+        if not response:
+            return None
+        
+        page_info = self._parse_page(url, response, extract_text, extract_meta)
+        if page_info and fetch_resources:
+            heads = await asyncio.gather(*(self.amake_request(img, method='HEAD')
+                                           for img in page_info['images']))
+            page_info['resources'] = [{
+                'url': img,
+                'status_code': head.status_code if head else None,
+                'content_type': head.headers.get('Content-Type') if head else None,
+                'content_length': head.headers.get('Content-Length') if head else None
+            } for img, head in zip(page_info['images'], heads)]
+        return page_info
+    
+    async def acrawl_site(self,
+                          start_url: str,
+                          max_pages: int = 100,
+                          allowed_domains: Optional[List[str]] = None,
+                          exclude_patterns: Optional[List[str]] = None,
+                          concurrency: int = 10,
+                          extract_text: bool = False,
+                          extract_meta: bool = False) -> List[Dict]:
+        """异步爬取整个网站，每批并发爬取多个页面
+        
+        Args:
+            start_url: 起始URL
+            max_pages: 最大爬取页面数
+            allowed_domains: 允许的域名列表
+            exclude_patterns: 排除的URL模式列表
+            concurrency: 每批并发爬取的页面数
+            extract_text: 是否提取页面全文
+            extract_meta: 是否提取meta标签
             
-            # 爬取页面
-            self.logger.info(f"Crawling: {url}")
-            page_info = self.crawl_page(url)
+        Returns:
+            爬取的页面列表
+        """
+        frontier = deque([start_url])
+        seen = {start_url}
+        crawled_pages = []
+        allowed_set, compiled = self._build_filters(start_url, allowed_domains, exclude_patterns)
+        
+        while frontier and len(crawled_pages) < max_pages:
+            batch_size = min(concurrency, max_pages - len(crawled_pages), len(frontier))
+            batch = [frontier.popleft() for _ in range(batch_size)]
+            self.logger.info(f"Crawling {len(batch)} pages concurrently")
+            results = await asyncio.gather(*(self.acrawl_page(url, extract_text=extract_text,
+                                                              extract_meta=extract_meta)
+                                             for url in batch))
             
-            if page_info:
+            for page_info in results:
+                if not page_info:
+                    continue
                 crawled_pages.append(page_info)
-                visited_urls.add(url)
-                
-                # 添加新发现的链接
-                for link in page_info['links']:
-                    if link not in visited_urls:
-                        pages_to_visit.add(link)
+                frontier.extend(self._filter_links(page_info['links'], seen, allowed_set, compiled))
             
-            # 延迟
-            time.sleep(self.delay)
+            # 批次间延迟
+            await asyncio.sleep(self.delay)
         
         return crawled_pages
     
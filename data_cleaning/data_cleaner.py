@@ -17,17 +17,19 @@ class DataCleaner:
         
         Args:
             file_path: 文件路径
-            file_type: 文件类型，支持 'csv', 'excel', 'json'
+            file_type: 文件类型，支持 'csv', 'excel', 'json', 'parquet'
             
         Returns:
-            加载的数据框
+            加载的数据框（基于Arrow存储）
         """
         if file_type == 'csv':
-            return pd.read_csv(file_path)
+            return pd.read_csv(file_path, engine='pyarrow', dtype_backend='pyarrow')
         elif file_type == 'excel':
-            return pd.read_excel(file_path)
+            return pd.read_excel(file_path, dtype_backend='pyarrow')
         elif file_type == 'json':
-            return pd.read_json(file_path)
+            return pd.read_json(file_path, dtype_backend='pyarrow')
+        elif file_type == 'parquet':
+            return pd.read_parquet(file_path, dtype_backend='pyarrow')
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
     
@@ -37,7 +39,7 @@ class DataCleaner:
         Args:
             df: 数据框
             file_path: 文件路径
-            file_type: 文件类型，支持 'csv', 'excel', 'json'
+            file_type: 文件类型，支持 'csv', 'excel', 'json', 'parquet'
         """
         if file_type == 'csv':
             df.to_csv(file_path, index=False)
@@ -45,6 +47,8 @@ class DataCleaner:
             df.to_excel(file_path, index=False)
         elif file_type == 'json':
             df.to_json(file_path, orient='records')
+        elif file_type == 'parquet':
+            df.to_parquet(file_path, index=False, compression='zstd')
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
     
@@ -59,7 +63,9 @@ class DataCleaner:
                 - 'standardize': 标准化
                 - 'remove_outliers': 删除异常值
                 - 'convert_type': 转换数据类型
-                - 'regex_replace': 正则替换
+                - 'regex_replace': 正则替换，参数 pattern、replacement；规则按添加顺序依次执行，
+                  连续多条都指定 fuse=True 时合并为一个交替模式只扫描一遍（各位置只由最先匹配
+                  的规则替换，替换结果不再被后续规则处理）
             **kwargs: 规则参数
         """
         if column not in self.cleaning_rules:
@@ -79,31 +85,112 @@ class DataCleaner:
         Returns:
             清洗后的数据框
         """
-        cleaned_df = df.copy()
+        # 累积的行保留掩码与被替换的列，结果只在最后生成一次，避免每条规则复制整个数据框
+        all_positions = np.arange(len(df))
+        keep_mask = np.ones(len(df), dtype=bool)
+        new_cols = {}  # 列名 -> (计算时保留的行位置, 计算结果)
         
         for column, rules in self.cleaning_rules.items():
-            if column not in cleaned_df.columns:
+            if column not in df.columns:
                 continue
+            
+            # 列统计量缓存，列值或行集合发生变化后失效
+            stats = None
                 
-            for rule in rules:
+            for rule in self._coalesce_regex_rules(rules):
                 rule_type = rule['type']
                 params = rule['params']
                 
+                # 取当前保留行上该列的最新值
+                positions = all_positions[keep_mask]
+                col_positions, series = new_cols.get(column, (all_positions, df[column]))
+                if len(col_positions) != len(positions):
+                    series = series.iloc[np.searchsorted(col_positions, positions)]
+                
                 if rule_type == 'fill_na':
-                    cleaned_df[column] = self._fill_na(cleaned_df[column], **params)
+                    new_cols[column] = (positions, self._fill_na(series, **params))
+                    stats = None
                 elif rule_type == 'remove_duplicates':
-                    cleaned_df = self._remove_duplicates(cleaned_df, column, **params)
+                    keep_mask[positions[series.duplicated(**params).to_numpy()]] = False
+                    stats = None
                 elif rule_type == 'standardize':
-                    cleaned_df[column] = self._standardize(cleaned_df[column], **params)
+                    if stats is None and params.get('method', 'zscore') == 'zscore':
+                        stats = self._column_stats(series)
+                    new_cols[column] = (positions, self._standardize(series, stats=stats, **params))
+                    stats = None
                 elif rule_type == 'remove_outliers':
-                    cleaned_df = self._remove_outliers(cleaned_df, column, **params)
+                    if stats is None:
+                        stats = self._column_stats(series)
+                    mask = self._outlier_mask(series, stats=stats, **params)
+                    if not mask.all():
+                        keep_mask[positions[~mask]] = False
+                        stats = None
                 elif rule_type == 'convert_type':
-                    cleaned_df[column] = self._convert_type(cleaned_df[column], **params)
+                    new_cols[column] = (positions, self._convert_type(series, **params))
+                    stats = None
                 elif rule_type == 'regex_replace':
-                    cleaned_df[column] = self._regex_replace(cleaned_df[column], **params)
+                    new_cols[column] = (positions, self._regex_replace_batch(series, params['pairs']))
+                    stats = None
+        
+        # 按最终保留的行生成结果
+        positions = all_positions[keep_mask]
+        cleaned_df = df.iloc[positions].copy()
+        for column, (col_positions, values) in new_cols.items():
+            if len(col_positions) != len(positions):
+                values = values.iloc[np.searchsorted(col_positions, positions)]
+            # 按位置写回；列名不一定是字符串，不能用 assign(**kwargs)
+            cleaned_df[column] = values.array
         
         return cleaned_df
     
+    def _coalesce_regex_rules(self, rules: List[Dict]) -> List[Dict]:
+        """将连续且都指定了 fuse=True 的正则替换规则合并为一条，参数为 (pattern, replacement) 列表
+        
+        未指定 fuse 的规则各自单独成条，按顺序依次替换。
+        
+        Args:
+            rules: 某一列的清洗规则列表
+            
+        Returns:
+            合并后的规则列表
+        """
+        merged = []
+        fusable = False  # merged中最后一条能否继续合并
+        for rule in rules:
+            if rule['type'] != 'regex_replace':
+                merged.append(rule)
+                fusable = False
+                continue
+            pair = (rule['params']['pattern'], rule['params']['replacement'])
+            fuse = rule['params'].get('fuse', False)
+            if fuse and fusable:
+                merged[-1]['params']['pairs'].append(pair)
+            else:
+                merged.append({'type': 'regex_replace', 'params': {'pairs': [pair]}})
+            fusable = fuse
+        return merged
+    
+    def _column_stats(self, series: pd.Series) -> Dict[str, float]:
+        """计算数值列的统计量（均值、标准差、四分位数），忽略缺失值
+        
+        Args:
+            series: 数据列
+            
+        Returns:
+            包含 'mean', 'std', 'q1', 'q3' 的字典
+        """
+        arr = series.to_numpy(dtype=float, na_value=np.nan)
+        arr = arr[~np.isnan(arr)]
+        if arr.size == 0:
+            return dict.fromkeys(('mean', 'std', 'q1', 'q3'), np.nan)
+        q1, q3 = np.quantile(arr, [0.25, 0.75])
+        return {
+            'mean': arr.mean(),
+            'std': arr.std(ddof=1) if arr.size > 1 else np.nan,  # 与pandas的std保持一致（样本标准差）
+            'q1': q1,
+            'q3': q3
+        }
+    
     def _fill_na(self, series: pd.Series, method: str = 'mean', value: Any = None) -> pd.Series:
         """填充缺失值
         
@@ -143,24 +230,29 @@ class DataCleaner:
         """
         return df.drop_duplicates(subset=[column], keep=keep)
     
-    def _standardize(self, series: pd.Series, method: str = 'zscore') -> pd.Series:
+    def _standardize(self, series: pd.Series, method: str = 'zscore',
+                     stats: Optional[Dict[str, float]] = None) -> pd.Series:
         """标准化数据
         
         Args:
             series: 数据列
             method: 标准化方法，支持 'zscore', 'minmax'
+            stats: 预先计算的列统计量，为None时现场计算
             
         Returns:
             标准化后的数据列
         """
         if method == 'zscore':
-            return (series - series.mean()) / series.std()
+            stats = stats or self._column_stats(series)
+            arr = series.to_numpy(dtype=float, na_value=np.nan)
+            return pd.Series((arr - stats['mean']) / stats['std'], index=series.index, name=series.name)
         elif method == 'minmax':
             return (series - series.min()) / (series.max() - series.min())
         else:
             raise ValueError(f"Unsupported standardization method: {method}")
     
-    def _remove_outliers(self, df: pd.DataFrame, column: str, method: str = 'zscore', threshold: float = 3.0) -> pd.DataFrame:
+    def _remove_outliers(self, df: pd.DataFrame, column: str, method: str = 'zscore', threshold: float = 3.0,
+                         stats: Optional[Dict[str, float]] = None) -> pd.DataFrame:
         """删除异常值
         
         Args:
@@ -168,20 +260,34 @@ class DataCleaner:
             column: 列名
             method: 异常值检测方法，支持 'zscore', 'iqr'
             threshold: 阈值
+            stats: 预先计算的列统计量，为None时现场计算
             
         Returns:
             删除异常值后的数据框
         """
-        if method == 'zscore':
-            z_scores = np.abs((df[column] - df[column].mean()) / df[column].std())
-            return df[z_scores < threshold]
-        elif method == 'iqr':
-            Q1 = df[column].quantile(0.25)
-            Q3 = df[column].quantile(0.75)
-            IQR = Q3 - Q1
-            return df[~((df[column] < (Q1 - 1.5 * IQR)) | (df[column] > (Q3 + 1.5 * IQR)))]
-        else:
+        return df.iloc[self._outlier_mask(df[column], method, threshold, stats)]
+    
+    def _outlier_mask(self, series: pd.Series, method: str = 'zscore', threshold: float = 3.0,
+                      stats: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """计算非异常值的布尔掩码
+        
+        Args:
+            series: 数据列
+            method: 异常值检测方法，支持 'zscore', 'iqr'
+            threshold: 阈值
+            stats: 预先计算的列统计量，为None时现场计算
+            
+        Returns:
+            布尔数组，True表示保留该行
+        """
+        if method not in ('zscore', 'iqr'):
             raise ValueError(f"Unsupported outlier detection method: {method}")
+        stats = stats or self._column_stats(series)
+        arr = series.to_numpy(dtype=float, na_value=np.nan)
+        if method == 'zscore':
+            return np.abs(arr - stats['mean']) < threshold * stats['std']
+        IQR = stats['q3'] - stats['q1']
+        return ~((arr < (stats['q1'] - 1.5 * IQR)) | (arr > (stats['q3'] + 1.5 * IQR)))
     
     def _convert_type(self, series: pd.Series, target_type: str) -> pd.Series:
         """转换数据类型
@@ -215,4 +321,54 @@ class DataCleaner:
         Returns:
             替换后的数据列
         """
-        return series.str.replace(pattern, replacement, regex=True) 
\ No newline at end of file
+        # 纯字面量的模式走非正则的快速路径
+        if re.escape(pattern) == pattern and '\\' not in replacement:
+            return series.str.replace(pattern, replacement, regex=False)
+        return self._re_replace(series, pattern, replacement)
+    
+    def _re_replace(self, series: pd.Series, pattern, replacement) -> pd.Series:
+        """用Python re做正则替换
+        
+        Arrow存储的列会交给pyarrow的RE2引擎，不支持环视、命名分组引用与回调替换，
+        且语法细节与re不同，因此先转为object列替换，再转回原类型。
+        
+        Args:
+            series: 数据列
+            pattern: 正则表达式模式（字符串或预编译模式）
+            replacement: 替换字符串或回调函数
+            
+        Returns:
+            替换后的数据列
+        """
+        if isinstance(series.dtype, pd.ArrowDtype):
+            return series.astype(object).str.replace(pattern, replacement, regex=True).astype(series.dtype)
+        return series.str.replace(pattern, replacement, regex=True)
+    
+    def _regex_replace_batch(self, series: pd.Series, pairs: List[tuple]) -> pd.Series:
+        """批量正则替换（仅用于显式指定 fuse=True 的规则）
+        
+        多条规则合并为一个带命名分组的交替模式，只扫描一遍数据列。合并后各位置
+        由最先匹配的规则替换，替换结果不会再被后续规则匹配。模式含捕获分组、
+        替换串含反向引用或无法合并时，退回逐条替换。
+        
+        Args:
+            series: 数据列
+            pairs: (pattern, replacement) 列表
+            
+        Returns:
+            替换后的数据列
+        """
+        if len(pairs) == 1:
+            return self._regex_replace(series, *pairs[0])
+        
+        try:
+            if any(re.compile(p).groups or '\\' in r for p, r in pairs):
+                raise re.error('capture groups or backreferences')
+            combined = re.compile('|'.join(f'(?P<r{i}>{p})' for i, (p, _) in enumerate(pairs)))
+        except re.error:
+            for pattern, replacement in pairs:
+                series = self._regex_replace(series, pattern, replacement)
+            return series
+        
+        repls = [r for _, r in pairs]
+        return self._re_replace(series, combined, lambda m: repls[int(m.lastgroup[1:])]) 
\ No newline at end of file
@@ -1,33 +1,293 @@
 import re
+import os
+import mmap
+import ipaddress
+import functools
 from datetime import datetime
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterable, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from dataclasses import dataclass
+from functools import cached_property
+from urllib.parse import parse_qsl
 from pathlib import Path
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+except ImportError:  # 未安装numba时结构化解析退回正则实现
+    njit = None
 
 # 目前用处不大
 
+
+def _read_file(path: str) -> bytes:
+    """一次性读入整个文件（读取期间释放GIL，可在线程池中并发）"""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_ts(s: str, fmt: str) -> datetime:
+    """解析时间戳；同一秒内的日志行时间戳字符串相同，缓存命中率很高"""
+    return datetime.strptime(s, fmt)
+
+
+# 结构化解析结果的字段布局（每行一条记录，字符串字段定长）
+LOG_DTYPE = np.dtype([
+    ('ts', 'datetime64[s]'),
+    ('ip', 'S45'),
+    ('method', 'S8'),
+    ('status', 'i4'),
+    ('resp', 'f4'),
+    ('size', 'i8'),
+    ('path_off', 'i8'),   # 请求路径（含查询串）在文件中的字节偏移
+    ('path_len', 'i4'),
+    ('line_off', 'i8'),   # 去掉首尾空白后的整行在文件中的字节偏移
+    ('line_len', 'i4'),
+])
+
+# _epoch_seconds 的非法返回值（合法时间可能早于1970年，不能用负数表示失败）
+_BAD_TIMESTAMP = -(1 << 62)
+
+_MONTHS = np.frombuffer(b'JanFebMarAprMayJunJulAugSepOctNovDec', dtype=np.uint8).reshape(12, 3)
+
+
+def _is_space(c):
+    return c == 32 or 9 <= c <= 13
+
+
+def _read_digits(buf, i, width):
+    """读取定长十进制数字，遇到非数字返回-1"""
+    value = 0
+    for k in range(i, i + width):
+        c = buf[k]
+        if c < 48 or c > 57:
+            return -1
+        value = value * 10 + (c - 48)
+    return value
+
+
+def _epoch_seconds(buf, i, months):
+    """解析 dd/Mon/YYYY:HH:MM:SS 为Unix秒，格式或取值非法时返回 _BAD_TIMESTAMP"""
+    day = _read_digits(buf, i, 2)
+    year = _read_digits(buf, i + 7, 4)
+    hour = _read_digits(buf, i + 12, 2)
+    minute = _read_digits(buf, i + 15, 2)
+    second = _read_digits(buf, i + 18, 2)
+    if buf[i + 2] != 47 or buf[i + 6] != 47 or buf[i + 11] != 58 or buf[i + 14] != 58 or buf[i + 17] != 58:
+        return _BAD_TIMESTAMP
+    if day < 1 or year < 1 or hour < 0 or hour > 23 or minute < 0 or minute > 59 or second < 0 or second > 59:
+        return _BAD_TIMESTAMP
+    
+    # 月份名不区分大小写
+    month = 0
+    for m in range(12):
+        if ((buf[i + 3] | 32) == (months[m, 0] | 32) and (buf[i + 4] | 32) == (months[m, 1] | 32)
+                and (buf[i + 5] | 32) == (months[m, 2] | 32)):
+            month = m + 1
+            break
+    if month == 0:
+        return _BAD_TIMESTAMP
+    
+    leap = year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+    if month == 2:
+        days_in_month = 29 if leap else 28
+    elif month == 4 or month == 6 or month == 9 or month == 11:
+        days_in_month = 30
+    else:
+        days_in_month = 31
+    if day > days_in_month:
+        return _BAD_TIMESTAMP
+    
+    # 公历日期转距1970-01-01的天数
+    y = year - 1 if month <= 2 else year
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * (month - 3 if month > 2 else month + 9) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    days = era * 146097 + doe - 719468
+    return days * 86400 + hour * 3600 + minute * 60 + second
+
+
+def _scan_access_line(buf, i, end, months, with_agent, row,
+                      ts, ip, method, status, resp, size, path_off, path_len, line_off, line_len):
+    """按 NGINX_PATTERN / APACHE_PATTERN 的语义扫描 buf[i:end] 这一行，成功时写入第row条记录"""
+    while i < end and (buf[i] == 32 or buf[i] == 9):
+        i += 1
+    start = i
+    
+    # ip
+    while i < end and not _is_space(buf[i]):
+        i += 1
+    ip_len = i - start
+    if ip_len == 0 or ip_len > ip.shape[1]:
+        return False
+    if (i + 6 > end or buf[i] != 32 or buf[i + 1] != 45 or buf[i + 2] != 32
+            or buf[i + 3] != 45 or buf[i + 4] != 32 or buf[i + 5] != 91):
+        return False
+    i += 6
+    
+    # 时间戳：方括号内第一个空白前的部分
+    ts_start = i
+    while i < end and buf[i] != 93:
+        i += 1
+    if i == end or i - ts_start < 20 or (i - ts_start > 20 and not _is_space(buf[ts_start + 20])):
+        return False
+    seconds = _epoch_seconds(buf, ts_start, months)
+    if seconds == _BAD_TIMESTAMP:
+        return False
+    if i + 3 > end or buf[i + 1] != 32 or buf[i + 2] != 34:
+        return False
+    i += 3
+    
+    # 请求方法
+    method_start = i
+    while i < end and 65 <= buf[i] <= 90:
+        i += 1
+    method_len = i - method_start
+    if method_len == 0 or method_len > method.shape[1] or i == end or buf[i] != 32:
+        return False
+    i += 1
+    
+    # 请求路径
+    path_start = i
+    while i < end and not _is_space(buf[i]):
+        i += 1
+    if i == path_start or i == end or buf[i] != 32:
+        return False
+    path_end = i
+    i += 1
+    
+    # 协议
+    protocol_start = i
+    while i < end and buf[i] != 34:
+        i += 1
+    if i == protocol_start or i == end:
+        return False
+    i += 1
+    
+    # 状态码与响应大小
+    if i + 5 > end or buf[i] != 32 or buf[i + 4] != 32:
+        return False
+    code = _read_digits(buf, i + 1, 3)
+    if code < 0:
+        return False
+    i += 5
+    size_start = i
+    nbytes = 0
+    while i < end and 48 <= buf[i] <= 57:
+        nbytes = nbytes * 10 + (buf[i] - 48)
+        i += 1
+    if i == size_start:
+        return False
+    
+    # referrer与user_agent
+    if with_agent:
+        for _ in range(2):
+            if i + 2 > end or buf[i] != 32 or buf[i + 1] != 34:
+                return False
+            i += 2
+            while i < end and buf[i] != 34:
+                i += 1
+            if i == end:
+                return False
+            i += 1
+    
+    stop = end
+    while stop > start and _is_space(buf[stop - 1]):
+        stop -= 1
+    
+    ts[row] = seconds
+    ip[row, :ip_len] = buf[start:start + ip_len]
+    method[row, :method_len] = buf[method_start:method_start + method_len]
+    status[row] = code
+    resp[row] = 0.0
+    size[row] = nbytes
+    path_off[row] = path_start
+    path_len[row] = path_end - path_start
+    line_off[row] = start
+    line_len[row] = stop - start
+    return True
+
+
+def _scan_access_log(buf, months, with_agent,
+                     ts, ip, method, status, resp, size, path_off, path_len, line_off, line_len):
+    """逐行扫描整块缓冲区，返回成功解析的行数"""
+    n = 0
+    pos = 0
+    total = buf.shape[0]
+    while pos < total:
+        eol = pos
+        while eol < total and buf[eol] != 10:
+            eol += 1
+        if _scan_access_line(buf, pos, eol, months, with_agent, n,
+                             ts, ip, method, status, resp, size, path_off, path_len, line_off, line_len):
+            n += 1
+        pos = eol + 1
+    return n
+
+
+if njit is not None:
+    _is_space = njit(cache=True)(_is_space)
+    _read_digits = njit(cache=True)(_read_digits)
+    _epoch_seconds = njit(cache=True)(_epoch_seconds)
+    _scan_access_line = njit(cache=True)(_scan_access_line)
+    _scan_access_log = njit(cache=True)(_scan_access_log)
+
+
 @dataclass
 class LogEntry:
     """日志条目数据类"""
     timestamp: datetime
     ip: str
     method: str
-    path: str
+    path_with_query: str
     status_code: int
     response_time: float
     user_agent: str
     referrer: str
-    request_params: Dict[str, str]
     raw_line: str
+    
+    @cached_property
+    def path(self) -> str:
+        """不含查询串的请求路径"""
+        return self.path_with_query.split('?', 1)[0]
+    
+    @cached_property
+    def request_params(self) -> Dict[str, str]:
+        """请求参数，首次访问时才解析查询串"""
+        parts = self.path_with_query.split('?', 1)
+        return dict(parse_qsl(parts[1], keep_blank_values=True)) if len(parts) > 1 else {}
 
 class LogParser:
     """通用日志解析器"""
     
     # Nginx日志格式模式
-    NGINX_PATTERN = r'(?P<ip>\S+) - - \[(?P<timestamp>.*?)\] "(?P<method>\S+) (?P<path>\S+) (?P<protocol>.*?)" (?P<status>\d+) (?P<size>\d+) "(?P<referrer>.*?)" "(?P<user_agent>.*?)"'
+    NGINX_PATTERN = r'(?P<ip>\S+) - - \[(?P<timestamp>[^\]]+)\] "(?P<method>[A-Z]+) (?P<path>\S+) (?P<protocol>[^"]+)" (?P<status>\d{3}) (?P<size>\d+) "(?P<referrer>[^"]*)" "(?P<user_agent>[^"]*)"'
     
     # Apache日志格式模式
-    APACHE_PATTERN = r'(?P<ip>\S+) - - \[(?P<timestamp>.*?)\] "(?P<method>\S+) (?P<path>\S+) (?P<protocol>.*?)" (?P<status>\d+) (?P<size>\d+)'
+    APACHE_PATTERN = r'(?P<ip>\S+) - - \[(?P<timestamp>[^\]]+)\] "(?P<method>[A-Z]+) (?P<path>\S+) (?P<protocol>[^"]+)" (?P<status>\d{3}) (?P<size>\d+)'
+    
+    # 可疑IP网段
+    SUSPICIOUS_IP_RANGES = [
+        '192.168.0.0/16',
+        '10.0.0.0/8',
+        '172.16.0.0/12'
+    ]
+    
+    # 可疑路径特征
+    SUSPICIOUS_PATH_PATTERNS = [
+        r'\.\./',
+        r'\.php',
+        r'\.asp',
+        r'\.jsp',
+        r'admin',
+        r'login',
+        r'config'
+    ]
     
     # MySQL慢查询日志格式模式
     MYSQL_SLOW_PATTERN = r'# Time: (?P<timestamp>.*?)\n# User@Host: (?P<user>.*?) @ (?P<host>.*?) \[(?P<ip>.*?)\]\n# Query_time: (?P<query_time>.*?) Lock_time: (?P<lock_time>.*?) Rows_sent: (?P<rows_sent>.*?) Rows_examined: (?P<rows_examined>.*?)\n(?P<query>.*?);'
@@ -40,15 +300,28 @@ class LogParser:
         """
         self.log_type = log_type
         self.pattern = self._get_pattern(log_type)
+        # 整文件扫描用的bytes模式：行首锚定，且各字段不跨行
+        single_line = self.pattern.pattern.replace(r'[^\]]', r'[^\]\n]').replace('[^"]', '[^"\\n]')
+        self._bytes_pattern = re.compile(rb'^[ \t]*' + single_line.encode(), re.MULTILINE)
+        # 逐行批量匹配用的str模式，与bytes模式规则一致：行首锚定，字符类只按ASCII解释
+        self._line_pattern = re.compile(r'^[ \t]*' + self.pattern.pattern, re.ASCII)
+        # 可疑网段预先解析为网络对象，IPv4网段另存为(掩码, 网络地址)整数对
+        self._suspicious_networks = [ipaddress.ip_network(c) for c in self.SUSPICIOUS_IP_RANGES]
+        self._suspicious_v4 = [
+            (int(net.netmask), int(net.network_address))
+            for net in self._suspicious_networks if net.version == 4
+        ]
+        # 可疑路径特征合并为一个正则，每条路径只扫描一遍
+        self._suspicious_path = re.compile('|'.join(self.SUSPICIOUS_PATH_PATTERNS), re.IGNORECASE)
     
-    def _get_pattern(self, log_type: str) -> str:
-        """获取对应日志类型的正则表达式模式"""
+    def _get_pattern(self, log_type: str) -> re.Pattern:
+        """获取对应日志类型的预编译正则表达式"""
         patterns = {
             'nginx': self.NGINX_PATTERN,
             'apache': self.APACHE_PATTERN,
             'mysql_slow': self.MYSQL_SLOW_PATTERN
         }
-        return patterns.get(log_type, self.NGINX_PATTERN)
+        return re.compile(patterns.get(log_type, self.NGINX_PATTERN))
     
     def parse_line(self, line: str) -> Optional[LogEntry]:
         """解析单行日志
@@ -60,45 +333,57 @@ class LogParser:
             解析后的日志条目，如果解析失败则返回None
         """
         try:
-            match = re.match(self.pattern, line)
+            match = self.pattern.match(line)
             if not match:
                 return None
-            
-            data = match.groupdict()
-            
-            # 解析时间戳
-            timestamp = datetime.strptime(
-                data['timestamp'].split()[0], 
-                '%d/%b/%Y:%H:%M:%S' if self.log_type in ['nginx', 'apache'] else '%y%m%d %H:%M:%S'
-            )
-            
-            # 解析请求参数
-            request_params = {}
-            if '?' in data['path']:
-                path, params = data['path'].split('?', 1)
-                for param in params.split('&'):
-                    if '=' in param:
-                        key, value = param.split('=', 1)
-                        request_params[key] = value
-            else:
-                path = data['path']
-            
-            return LogEntry(
-                timestamp=timestamp,
-                ip=data['ip'],
-                method=data['method'],
-                path=path,
-                status_code=int(data['status']),
-                response_time=float(data.get('query_time', 0)),
-                user_agent=data.get('user_agent', ''),
-                referrer=data.get('referrer', ''),
-                request_params=request_params,
-                raw_line=line
-            )
+            return self._entry_from_groups(match.groupdict(), line)
         except Exception as e:
             print(f"Error parsing line: {e}")
             return None
     
+    def _entry_from_match(self, match: re.Match, buf) -> LogEntry:
+        """由bytes模式的匹配结果构造日志条目，只解码捕获到的分组
+        
+        Args:
+            match: bytes模式的匹配结果
+            buf: 被扫描的缓冲区
+            
+        Returns:
+            日志条目
+        """
+        data = {k: v.decode('utf-8', 'replace') for k, v in match.groupdict().items() if v is not None}
+        line_end = buf.find(b'\n', match.end())
+        raw_line = buf[match.start():line_end if line_end != -1 else len(buf)].strip()
+        return self._entry_from_groups(data, raw_line.decode('utf-8', 'replace'))
+    
+    def _entry_from_groups(self, data: Dict[str, str], raw_line: str) -> LogEntry:
+        """由正则分组构造日志条目
+        
+        Args:
+            data: 分组名到分组内容的字典
+            raw_line: 原始日志行
+            
+        Returns:
+            日志条目
+        """
+        # 解析时间戳
+        timestamp = _parse_ts(
+            data['timestamp'].split()[0], 
+            '%d/%b/%Y:%H:%M:%S' if self.log_type in ['nginx', 'apache'] else '%y%m%d %H:%M:%S'
+        )
+        
+        return LogEntry(
+            timestamp=timestamp,
+            ip=data['ip'],
+            method=data['method'],
+            path_with_query=data['path'],
+            status_code=int(data['status']),
+            response_time=float(data.get('query_time', 0)),
+            user_agent=data.get('user_agent', ''),
+            referrer=data.get('referrer', ''),
+            raw_line=raw_line
+        )
+    
     def parse_file(self, file_path: Union[str, Path]) -> List[LogEntry]:
         """解析日志文件
         
@@ -108,68 +393,283 @@ class LogParser:
         Returns:
             解析后的日志条目列表
         """
+        if os.path.getsize(file_path) == 0:
+            return []
+        # 把文件映射进内存，直接用bytes模式在整块缓冲区上扫描，省去逐行解码与strip
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return self._parse_buffer(mm)
+    
+    def parse_files(self, file_paths: Iterable[Union[str, Path]], max_workers: int = 8) -> Dict[str, List[LogEntry]]:
+        """批量解析多个日志文件
+        
+        文件读取交给线程池并发进行，哪个文件先读完就先解析哪个，读取与解析相互交叠；
+        同时在途的读取数不超过 max_workers 的两倍，控制内存中尚未解析的缓冲区数量。
+        
+        Args:
+            file_paths: 日志文件路径列表
+            max_workers: 读取线程数
+            
+        Returns:
+            文件路径到其日志条目列表的字典，顺序与传入的路径一致
+        """
+        paths = list(dict.fromkeys(os.fspath(p) for p in file_paths))
+        results = {}
+        pending = deque(paths)
+        in_flight = {}
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending or in_flight:
+                while pending and len(in_flight) < max_workers * 2:
+                    path = pending.popleft()
+                    in_flight[executor.submit(_read_file, path)] = path
+                
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = in_flight.pop(future)
+                    results[path] = self._parse_buffer(future.result())
+        
+        return {path: results[path] for path in paths}
+    
+    def _parse_buffer(self, buf) -> List[LogEntry]:
+        """用bytes模式扫描整块缓冲区，解析出其中的所有日志条目"""
         entries = []
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                entry = self.parse_line(line.strip())
-                if entry:
-                    entries.append(entry)
+        for match in self._bytes_pattern.finditer(buf):
+            try:
+                entries.append(self._entry_from_match(match, buf))
+            except Exception as e:
+                print(f"Error parsing line: {e}")
         return entries
     
-    def detect_anomalies(self, entries: List[LogEntry]) -> Dict[str, List[LogEntry]]:
-        """检测异常日志条目
+    def parse_file_structured(self, file_path: Union[str, Path]) -> np.ndarray:
+        """解析日志文件为 LOG_DTYPE 结构化数组
+        
+        安装了numba时，nginx/apache日志由编译后的扫描函数直接在mmap缓冲区上逐字节解析，
+        不创建任何Python对象；否则退回bytes正则逐条填充。按行数一次性预分配数组。
         
         Args:
-            entries: 日志条目列表
+            file_path: 日志文件路径
             
         Returns:
-            包含异常检测结果的字典
+            结构化数组，每个成功解析的行一条记录
         """
-        anomalies = {
-            'high_response_time': [],
-            'error_status': [],
-            'suspicious_ips': [],
-            'suspicious_paths': []
-        }
+        if os.path.getsize(file_path) == 0:
+            return np.empty(0, dtype=LOG_DTYPE)
         
-        for entry in entries:
-            # 检测高响应时间
-            if entry.response_time > 1.0:  # 超过1秒
-                anomalies['high_response_time'].append(entry)
+        buf = np.memmap(file_path, dtype=np.uint8, mode='r')
+        rows = int(np.count_nonzero(buf == 10)) + 1
+        columns = (
+            np.zeros(rows, dtype=np.int64),
+            np.zeros((rows, LOG_DTYPE['ip'].itemsize), dtype=np.uint8),
+            np.zeros((rows, LOG_DTYPE['method'].itemsize), dtype=np.uint8),
+            np.zeros(rows, dtype=np.int32),
+            np.zeros(rows, dtype=np.float32),
+            np.zeros(rows, dtype=np.int64),
+            np.zeros(rows, dtype=np.int64),
+            np.zeros(rows, dtype=np.int32),
+            np.zeros(rows, dtype=np.int64),
+            np.zeros(rows, dtype=np.int32),
+        )
+        if njit is not None and self.log_type in ['nginx', 'apache']:
+            n = _scan_access_log(buf, _MONTHS, self.log_type == 'nginx', *columns)
+        else:
+            with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                n = self._scan_structured_regex(mm, *columns)
+        del buf
+        
+        ts, ip, method, status, resp, size, path_off, path_len, line_off, line_len = columns
+        result = np.empty(n, dtype=LOG_DTYPE)
+        result['ts'] = ts[:n].view('datetime64[s]')
+        result['ip'] = ip[:n].view(LOG_DTYPE['ip']).ravel()
+        result['method'] = method[:n].view(LOG_DTYPE['method']).ravel()
+        result['status'] = status[:n]
+        result['resp'] = resp[:n]
+        result['size'] = size[:n]
+        result['path_off'] = path_off[:n]
+        result['path_len'] = path_len[:n]
+        result['line_off'] = line_off[:n]
+        result['line_len'] = line_len[:n]
+        return result
+    
+    def _scan_structured_regex(self, mm, ts, ip, method, status, resp, size,
+                               path_off, path_len, line_off, line_len) -> int:
+        """parse_file_structured 的正则实现，返回成功解析的行数"""
+        n = 0
+        for match in self._bytes_pattern.finditer(mm):
+            try:
+                entry = self._entry_from_match(match, mm)
+            except Exception as e:
+                print(f"Error parsing line: {e}")
+                continue
+            ip_bytes = entry.ip.encode('utf-8')
+            method_bytes = entry.method.encode('utf-8')
+            if len(ip_bytes) > ip.shape[1] or len(method_bytes) > method.shape[1]:
+                continue
             
-            # 检测错误状态码
-            if entry.status_code >= 400:
-                anomalies['error_status'].append(entry)
+            line_end = mm.find(b'\n', match.end())
+            line = mm[match.start():line_end if line_end != -1 else len(mm)]
+            ts[n] = np.datetime64(entry.timestamp, 's').astype(np.int64)
+            ip[n, :len(ip_bytes)] = np.frombuffer(ip_bytes, dtype=np.uint8)
+            method[n, :len(method_bytes)] = np.frombuffer(method_bytes, dtype=np.uint8)
+            status[n] = entry.status_code
+            resp[n] = entry.response_time
+            size[n] = int(match.group('size'))
+            path_off[n], path_end = match.span('path')
+            path_len[n] = path_end - path_off[n]
+            stripped = line.strip()
+            line_off[n] = match.start() + line.find(stripped[:1])
+            line_len[n] = len(stripped)
+            n += 1
+        return n
+    
+    def parse_file_vectorized(self, file_path: Union[str, Path]) -> pd.DataFrame:
+        """批量解析日志文件，结果保留为DataFrame
+        
+        用 str.extract 一次性对所有行做正则匹配，时间戳与数值列整列转换，
+        适合大文件的批量分析，无需逐条构造 LogEntry。
+        
+        Args:
+            file_path: 日志文件路径
             
-            # 检测可疑IP（示例：来自特定国家/地区的IP）
-            if self._is_suspicious_ip(entry.ip):
-                anomalies['suspicious_ips'].append(entry)
+        Returns:
+            列与 LogEntry 字段一致（另含不带查询串的path列）的DataFrame，无法解析的行被丢弃
+        """
+        # 与 parse_file 一样只按\n分行、按UTF-8宽松解码，原始行只去掉首尾的ASCII空白
+        with open(file_path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+            lines = pd.Series(f.read().split('\n'), dtype=object)
+        
+        df = lines.str.extract(self._line_pattern)
+        # mysql_slow等日志没有方法、路径与状态码分组，按缺省值补齐
+        for column, default in (('method', ''), ('path', ''), ('status', 0)):
+            if column not in df:
+                df[column] = default
+        matched = df['ip'].notna()
+        df, lines = df[matched], lines[matched].str.strip(' \t\n\r\x0b\x0c')
+        
+        # 解析时间戳，格式不符的行与逐行解析一样被跳过
+        fmt = '%d/%b/%Y:%H:%M:%S' if self.log_type in ['nginx', 'apache'] else '%y%m%d %H:%M:%S'
+        ts_text = df['timestamp'].str.split(n=1).str[0]
+        timestamp = pd.to_datetime(ts_text, format=fmt, errors='coerce', cache=True)
+        # pandas把60/61秒进位到下一分钟，datetime则直接报错，这里与逐行解析保持一致
+        valid = timestamp.notna() & ~ts_text.str.endswith((':60', ':61'))
+        df, lines, timestamp = df[valid], lines[valid], timestamp[valid]
+        
+        return pd.DataFrame({
+            'timestamp': timestamp,
+            'ip': df['ip'],
+            'method': df['method'],
+            'path_with_query': df['path'],
+            'path': df['path'].str.split('?', n=1).str[0],
+            'status_code': df['status'].astype(int),
+            'response_time': df['query_time'].astype(float) if 'query_time' in df else 0.0,
+            'user_agent': df['user_agent'] if 'user_agent' in df else '',
+            'referrer': df['referrer'] if 'referrer' in df else '',
+            'raw_line': lines,
+        }).reset_index(drop=True)
+    
+    def to_entries(self, df: pd.DataFrame) -> List[LogEntry]:
+        """将 parse_file_vectorized 的结果转换回日志条目列表，供按条目处理的旧代码使用
+        
+        Args:
+            df: parse_file_vectorized 返回的DataFrame
+            
+        Returns:
+            日志条目列表
+        """
+        timestamps = df['timestamp'].dt.to_pydatetime()
+        return [
+            LogEntry(
+                timestamp=ts,
+                ip=ip,
+                method=method,
+                path_with_query=path_with_query,
+                status_code=int(status_code),
+                response_time=float(response_time),
+                user_agent=user_agent,
+                referrer=referrer,
+                raw_line=raw_line
+            )
+            for ts, ip, method, path_with_query, status_code, response_time, user_agent, referrer, raw_line in zip(
+                timestamps, df['ip'], df['method'], df['path_with_query'], df['status_code'],
+                df['response_time'], df['user_agent'], df['referrer'], df['raw_line']
+            )
+        ]
+    
+    def detect_anomalies(
+        self, entries: Union[pd.DataFrame, List[LogEntry]]
+    ) -> Dict[str, Union[pd.DataFrame, List[LogEntry]]]:
+        """检测异常日志条目
+        
+        各类异常都按列整体比较得到布尔掩码，不再逐条判断。
+        
+        Args:
+            entries: parse_file_vectorized 返回的DataFrame，或日志条目列表
             
-            # 检测可疑路径
-            if self._is_suspicious_path(entry.path):
-                anomalies['suspicious_paths'].append(entry)
+        Returns:
+            包含异常检测结果的字典；传入DataFrame时值为DataFrame，传入列表时值为日志条目列表
+        """
+        if isinstance(entries, pd.DataFrame):
+            df = entries
+        else:
+            df = pd.DataFrame({
+                'ip': pd.Series([entry.ip for entry in entries], dtype=object),
+                'path': pd.Series([entry.path for entry in entries], dtype=object),
+                'status_code': np.fromiter((entry.status_code for entry in entries), dtype=np.int64, count=len(entries)),
+                'response_time': np.fromiter((entry.response_time for entry in entries), dtype=np.float64, count=len(entries)),
+            })
         
-        return anomalies
+        masks = {
+            # 超过1秒
+            'high_response_time': df['response_time'] > 1.0,
+            'error_status': df['status_code'] >= 400,
+            # 可疑IP（示例：来自特定国家/地区的IP）
+            'suspicious_ips': self._suspicious_ip_mask(df['ip']),
+            'suspicious_paths': self._suspicious_path_mask(df['path']),
+        }
+        
+        if isinstance(entries, pd.DataFrame):
+            return {name: df[mask] for name, mask in masks.items()}
+        return {name: [entries[i] for i in np.flatnonzero(mask.to_numpy())] for name, mask in masks.items()}
     
     def _is_suspicious_ip(self, ip: str) -> bool:
-        """判断IP是否可疑"""
-        # 这里可以添加更多的IP检测逻辑
-        suspicious_ranges = [
-            '192.168.0.0/16',
-            '10.0.0.0/8',
-            '172.16.0.0/12'
-        ]
-        return any(ip.startswith(prefix) for prefix in suspicious_ranges)
+        """判断IP是否可疑（落在 SUSPICIOUS_IP_RANGES 任一网段内）"""
+        try:
+            addr = ipaddress.ip_address(ip)
+        except ValueError:
+            return False
+        if addr.version == 4:
+            value = int(addr)
+            return any(value & mask == network for mask, network in self._suspicious_v4)
+        return any(addr in net for net in self._suspicious_networks)
+    
+    def _suspicious_ip_mask(self, ips: pd.Series) -> pd.Series:
+        """批量判断IP是否可疑，点分IPv4先打包为uint32再按网段做位运算
+        
+        Args:
+            ips: IP字符串序列
+            
+        Returns:
+            与ips同索引的布尔序列，非IPv4地址逐个判断
+        """
+        octets = ips.str.extract(r'^' + r'\.'.join([r'(0|[1-9]\d{0,2})'] * 4) + r'$').astype(float)
+        is_v4 = octets.notna().all(axis=1) & (octets <= 255).all(axis=1)
+        octets = octets[is_v4].astype(np.uint32).to_numpy()
+        packed = (octets[:, 0] << 24) | (octets[:, 1] << 16) | (octets[:, 2] << 8) | octets[:, 3]
+        
+        hit = np.zeros(len(packed), dtype=bool)
+        for mask, network in self._suspicious_v4:
+            hit |= (packed & np.uint32(mask)) == np.uint32(network)
+        
+        result = pd.Series(False, index=ips.index)
+        result[is_v4] = hit
+        others = ~is_v4 & ips.notna()
+        if others.any():
+            result[others] = ips[others].map(self._is_suspicious_ip)
+        return result
     
     def _is_suspicious_path(self, path: str) -> bool:
         """判断路径是否可疑"""
-        suspicious_patterns = [
-            r'\.\./',
-            r'\.php',
-            r'\.asp',
-            r'\.jsp',
-            r'admin',
-            r'login',
-            r'config'
-        ]
-        return any(re.search(pattern, path, re.IGNORECASE) for pattern in suspicious_patterns) 
\ No newline at end of file
+        return self._suspicious_path.search(path) is not None
+    
+    def _suspicious_path_mask(self, paths: pd.Series) -> pd.Series:
+        """批量判断路径是否可疑"""
+        return paths.str.contains(self._suspicious_path, na=False) 
\ No newline at end of file
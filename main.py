@@ -48,7 +48,7 @@ def parse_args():
     parser.add_argument('--input-file', type=str,
                        help='输入文件路径')
     parser.add_argument('--file-type', type=str, default='csv',
-                       choices=['csv', 'excel', 'json'],
+                       choices=['csv', 'excel', 'json', 'parquet'],
                        help='文件类型')
     
     # 恶意代码检测参数
@@ -85,14 +85,14 @@ def main():
     if args.analyze_logs and args.log_file:
         logger.info("开始分析日志...")
         parser = LogParser(log_type=args.log_type)
-        entries = parser.parse_file(args.log_file)
+        entries = parser.parse_file_vectorized(args.log_file)
         anomalies = parser.detect_anomalies(entries)
         
         # 输出异常检测结果
         for anomaly_type, anomaly_entries in anomalies.items():
             logger.info(f"发现 {len(anomaly_entries)} 个{anomaly_type}异常")
-            for entry in anomaly_entries[:5]:  # 只显示前5个异常
-                logger.info(f"异常详情: {entry.raw_line}")
+            for raw_line in anomaly_entries['raw_line'].head(5):  # 只显示前5个异常
+                logger.info(f"异常详情: {raw_line}")
     
     # 数据清洗功能
     if args.clean_data and args.input_file:
@@ -1,11 +1,16 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request
+import orjson
 import random
 from datetime import datetime, timedelta
 import json
 import os
+import functools
 
 app = Flask(__name__)
 
+PER_PAGE = 10
+MOCK_DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mock_data.json')
+
 # 生成模拟数据
 def generate_mock_data():
     users = []
@@ -21,41 +26,74 @@ def generate_mock_data():
         users.append(user)
     return users
 
-# 保存模拟数据
-mock_data = generate_mock_data()
-with open('mock_data.json', 'w', encoding='utf-8') as f:
-    json.dump(mock_data, f, ensure_ascii=False, indent=2)
+# 读取模拟数据，文件不存在或为空时才重新生成并保存
+def load_mock_data():
+    if os.path.exists(MOCK_DATA_FILE) and os.path.getsize(MOCK_DATA_FILE) > 0:
+        with open(MOCK_DATA_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    mock_data = generate_mock_data()
+    with open(MOCK_DATA_FILE, 'w', encoding='utf-8') as f:
+        json.dump(mock_data, f, ensure_ascii=False, indent=2)
+    return mock_data
 
-@app.route('/')
-def index():
-    page = int(request.args.get('page', 1))
-    per_page = 10
-    total_pages = (len(mock_data) + per_page - 1) // per_page
-    
-    start = (page - 1) * per_page
-    end = start + per_page
-    current_page_data = mock_data[start:end]
-    
+# 首次请求时才加载模拟数据，总页数随之算好
+@functools.lru_cache(maxsize=None)
+def get_mock_data():
+    mock_data = load_mock_data()
+    total_pages = (len(mock_data) + PER_PAGE - 1) // PER_PAGE
+    return mock_data, total_pages
+
+# 按页预先切好数据，并把每页的接口响应提前序列化
+@functools.lru_cache(maxsize=None)
+def get_pages():
+    mock_data, total_pages = get_mock_data()
+    pages = [mock_data[i:i + PER_PAGE] for i in range(0, len(mock_data), PER_PAGE)]
+    page_bytes = [
+        dump_page(page_data, i + 1, total_pages)
+        for i, page_data in enumerate(pages)
+    ]
+    return pages, page_bytes
+
+def dump_page(page_data, page, total_pages):
+    return orjson.dumps({
+        'data': page_data,
+        'current_page': page,
+        'total_pages': total_pages
+    }, option=orjson.OPT_SORT_KEYS)
+
+# 取某一页的数据，页码超出范围时按切片规则现算
+def get_page(page):
+    pages, _ = get_pages()
+    if 1 <= page <= len(pages):
+        return pages[page - 1]
+    mock_data, _ = get_mock_data()
+    start = (page - 1) * PER_PAGE
+    return mock_data[start:start + PER_PAGE]
+
+# 各页渲染结果缓存起来，模拟数据只读，无需每次重新渲染
+@functools.lru_cache(maxsize=128)
+def render_index(page):
+    _, total_pages = get_mock_data()
     return render_template('index.html',
-                         users=current_page_data,
+                         users=get_page(page),
                          current_page=page,
                          total_pages=total_pages)
 
+@app.route('/')
+def index():
+    page = int(request.args.get('page', 1))
+    return render_index(page)
+
 @app.route('/api/comments')
 def api_comments():
     page = int(request.args.get('page', 1))
-    per_page = 10
-    total_pages = (len(mock_data) + per_page - 1) // per_page
-    
-    start = (page - 1) * per_page
-    end = start + per_page
-    current_page_data = mock_data[start:end]
-    
-    return jsonify({
-        'data': current_page_data,
-        'current_page': page,
-        'total_pages': total_pages
-    })
+    _, page_bytes = get_pages()
+    if 1 <= page <= len(page_bytes):
+        body = page_bytes[page - 1]
+    else:
+        _, total_pages = get_mock_data()
+        body = dump_page(get_page(page), page, total_pages)
+    return Response(body, mimetype='application/json')
 
 if __name__ == '__main__':
     app.run(debug=True) 
\ No newline at end of file
@@ -1,11 +1,27 @@
 import json
 import csv
+import os
 import yaml
 from pathlib import Path
 from typing import Dict, List, Union, Any
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv, json as pa_json
 import logging
 
+try:
+    import orjson
+except ImportError:  # 未安装orjson时退回标准库json
+    orjson = None
+
+try:
+    from yaml import CSafeLoader as YamlLoader, CSafeDumper as YamlDumper
+except ImportError:  # PyYAML未编译libyaml绑定时退回纯Python实现
+    from yaml import SafeLoader as YamlLoader, SafeDumper as YamlDumper
+
+# 与pandas一致按缺失值处理的文本（比pyarrow默认多 '<NA>' 与 'None'）
+_CSV_NULL_VALUES = pa_csv.ConvertOptions().null_values + ['<NA>', 'None']
+
 class DataConverter:
     """数据格式转换工具类"""
     
@@ -17,35 +33,38 @@ class DataConverter:
         )
         self.logger = logging.getLogger(__name__)
     
-    def load_file(self, file_path: Union[str, Path]) -> Dict[str, Any]:
+    def load_file(self, file_path: Union[str, Path]) -> Union[Dict[str, Any], List, pd.DataFrame]:
         """加载文件并自动识别格式
         
         Args:
             file_path: 文件路径
             
         Returns:
-            解析后的数据
+            解析后的数据，CSV与JSON Lines文件保持为列式的DataFrame
         """
-        file_path = Path(file_path)
-        if not file_path.exists():
-            raise FileNotFoundError(f"文件不存在: {file_path}")
-            
-        suffix = file_path.suffix.lower()
+        # 不预先stat检查文件是否存在，直接打开，文件缺失时由open抛出FileNotFoundError
+        file_path = os.fspath(file_path)
+        suffix = os.path.splitext(file_path)[1].lower()
         try:
             if suffix == '.json':
                 return self._load_json(file_path)
+            elif suffix == '.jsonl':
+                return self._load_jsonl(file_path)
             elif suffix == '.csv':
                 return self._load_csv(file_path)
             elif suffix in ['.yaml', '.yml']:
                 return self._load_yaml(file_path)
             else:
                 raise ValueError(f"不支持的文件格式: {suffix}")
+        except FileNotFoundError:
+            self.logger.error(f"文件不存在: {file_path}")
+            raise
         except Exception as e:
             self.logger.error(f"加载文件失败: {e}")
             raise
     
     def save_file(self, 
-                 data: Union[Dict, List],
+                 data: Union[Dict, List, pd.DataFrame],
                  output_path: Union[str, Path],
                  format: str = None) -> None:
         """保存数据到指定格式的文件
@@ -53,15 +72,21 @@ class DataConverter:
         Args:
             data: 要保存的数据
             output_path: 输出文件路径
-            format: 输出格式（json/csv/yaml），如果为None则根据文件后缀自动判断
+            format: 输出格式（json/jsonl/csv/yaml），如果为None则根据文件后缀自动判断
         """
-        output_path = Path(output_path)
+        output_path = os.fspath(output_path)
         if format is None:
-            format = output_path.suffix.lower().lstrip('.')
+            format = os.path.splitext(output_path)[1].lower().lstrip('.')
+        
+        # DataFrame只在写出嵌套格式时才转成记录列表
+        if isinstance(data, pd.DataFrame) and format not in ['csv', 'jsonl']:
+            data = data.to_dict('records')
             
         try:
             if format == 'json':
                 self._save_json(data, output_path)
+            elif format == 'jsonl':
+                self._save_jsonl(data, output_path)
             elif format == 'csv':
                 self._save_csv(data, output_path)
             elif format in ['yaml', 'yml']:
@@ -87,37 +112,90 @@ class DataConverter:
         self.save_file(data, output_path, output_format)
         self.logger.info(f"转换完成: {input_path} -> {output_path}")
     
-    def _load_json(self, file_path: Path) -> Dict[str, Any]:
+    def _load_json(self, file_path: str) -> Dict[str, Any]:
         """加载JSON文件"""
+        if orjson is not None:
+            with open(file_path, 'rb') as f:
+                return orjson.loads(f.read())
         with open(file_path, 'r', encoding='utf-8') as f:
             return json.load(f)
     
-    def _load_csv(self, file_path: Path) -> List[Dict[str, Any]]:
+    def _load_jsonl(self, file_path: str) -> pd.DataFrame:
+        """加载JSON Lines文件"""
+        with pa_json.open_json(file_path) as reader:
+            schema = reader.schema
+        text = pd.ArrowDtype(pa.string())
+        df = pd.read_json(file_path, lines=True, engine='pyarrow', dtype_backend='pyarrow',
+                          dtype={name: text for name in self._temporal_fields(schema)} or None)
+        # 显式指定类型的字段会被排到最前，恢复文件中的字段顺序
+        df = df[[c for c in schema.names if c in df.columns] + [c for c in df.columns if c not in schema.names]]
+        return self._temporal_to_text(df)
+    
+    def _load_csv(self, file_path: str) -> pd.DataFrame:
         """加载CSV文件"""
-        df = pd.read_csv(file_path)
-        return df.to_dict('records')
+        # pandas的dtype参数在pyarrow解析之后才转换类型，这里直接用pyarrow按列指定类型
+        options = dict(null_values=_CSV_NULL_VALUES, strings_can_be_null=True)
+        with pa_csv.open_csv(file_path, convert_options=pa_csv.ConvertOptions(**options)) as reader:
+            schema = reader.schema
+        table = pa_csv.read_csv(file_path, convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in self._temporal_fields(schema)}, **options))
+        return self._temporal_to_text(table.to_pandas(types_mapper=pd.ArrowDtype))
+    
+    def _temporal_fields(self, schema: pa.Schema) -> List[str]:
+        """流式读取首个数据块推断出的日期/时间类型字段
+        
+        pyarrow会把形如日期、时间的文本推断为时间类型，写出JSON/YAML时无法序列化，
+        写出JSON Lines时也会被改写格式；这些字段在完整读取时直接指定为文本，文件只解析一遍。
+        
+        Args:
+            schema: 首个数据块的schema
+            
+        Returns:
+            字段名列表
+        """
+        return [field.name for field in schema if pa.types.is_temporal(field.type)]
     
-    def _load_yaml(self, file_path: Path) -> Dict[str, Any]:
+    def _temporal_to_text(self, df: pd.DataFrame) -> pd.DataFrame:
+        """首块中全为空、之后才推断为日期/时间类型的列转为文本"""
+        text = pd.ArrowDtype(pa.string())
+        for column, dtype in df.dtypes.items():
+            if isinstance(dtype, pd.ArrowDtype) and pa.types.is_temporal(dtype.pyarrow_dtype):
+                df[column] = df[column].astype(text)
+        return df
+    
+    def _load_yaml(self, file_path: str) -> Dict[str, Any]:
         """加载YAML文件"""
         with open(file_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=YamlLoader)
     
-    def _save_json(self, data: Union[Dict, List], output_path: Path) -> None:
+    def _save_json(self, data: Union[Dict, List], output_path: str) -> None:
         """保存为JSON文件"""
+        if orjson is not None:
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            return
         with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+    
+    def _save_jsonl(self, data: Union[Dict, List, pd.DataFrame], output_path: str) -> None:
+        """保存为JSON Lines文件"""
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame([data] if isinstance(data, dict) else data)
+        df.to_json(output_path, orient='records', lines=True, force_ascii=False, date_format='iso')
     
-    def _save_csv(self, data: Union[Dict, List], output_path: Path) -> None:
+    def _save_csv(self, data: Union[Dict, List, pd.DataFrame], output_path: str) -> None:
         """保存为CSV文件"""
+        if isinstance(data, pd.DataFrame):
+            data.to_csv(output_path, index=False, encoding='utf-8')
+            return
         if isinstance(data, dict):
             data = [data]
         df = pd.DataFrame(data)
         df.to_csv(output_path, index=False, encoding='utf-8')
     
-    def _save_yaml(self, data: Union[Dict, List], output_path: Path) -> None:
+    def _save_yaml(self, data: Union[Dict, List], output_path: str) -> None:
         """保存为YAML文件"""
         with open(output_path, 'w', encoding='utf-8') as f:
-            yaml.dump(data, f, allow_unicode=True, sort_keys=False)
+            yaml.dump(data, f, Dumper=YamlDumper, allow_unicode=True, sort_keys=False)
 
 # 使用示例
 # if __name__ == '__main__':
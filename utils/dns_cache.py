@@ -0,0 +1,36 @@
+import socket
+import time
+from typing import Optional
+
+# 进程内DNS解析缓存：由 enable_dns_cache 按需安装，解析结果过期后重新解析
+_system_getaddrinfo = socket.getaddrinfo
+_dns_cache = {}
+_dns_cache_ttl = 300.0
+
+
+def _cached_getaddrinfo(*args, **kwargs):
+    """带过期时间的socket.getaddrinfo，解析失败不缓存"""
+    key = (args, tuple(sorted(kwargs.items())))
+    now = time.monotonic()
+    entry = _dns_cache.get(key)
+    if entry is not None and now - entry[0] < _dns_cache_ttl:
+        return entry[1]
+    result = _system_getaddrinfo(*args, **kwargs)
+    if len(_dns_cache) >= 1024:
+        _dns_cache.clear()
+    _dns_cache[key] = (now, result)
+    return result
+
+
+def enable_dns_cache(ttl: Optional[float] = None) -> None:
+    """在进程内启用DNS解析缓存
+
+    替换全局的socket.getaddrinfo，同一主机在ttl秒内只解析一次；重复调用不会重复包装。
+
+    Args:
+        ttl: 解析结果的缓存时间（秒），为None时保持当前设置（默认300秒）
+    """
+    global _dns_cache_ttl
+    if ttl is not None:
+        _dns_cache_ttl = ttl
+    socket.getaddrinfo = _cached_getaddrinfo
@@ -1,70 +1,169 @@
 import re
+import os
+import mmap
 from typing import List, Dict, Optional
-from collections import defaultdict
+from collections import Counter
 import json
 
+try:
+    import hyperscan
+except ImportError:  # 未安装hyperscan时退回re实现
+    hyperscan = None
+
 class SecurityPatterns:
-    """安全检测相关的正则表达式模式"""
+    """安全检测相关的正则表达式模式（类加载时预编译）"""
     
     # SQL注入模式
     SQL_INJECTION_PATTERNS = {
-        'union_select': r'(?i)UNION\s+SELECT',
-        'sleep': r'(?i)SLEEP\s*\(',
-        'benchmark': r'(?i)BENCHMARK\s*\(',
-        'information_schema': r'(?i)INFORMATION_SCHEMA',
-        'comment': r'(?i)--\s*$|/\*.*?\*/',
-        'concat': r'(?i)CONCAT\s*\(',
-        'group_concat': r'(?i)GROUP_CONCAT\s*\(',
+        'union_select': re.compile(r'UNION\s+SELECT', re.IGNORECASE),
+        'sleep': re.compile(r'SLEEP\s*\(', re.IGNORECASE),
+        'benchmark': re.compile(r'BENCHMARK\s*\(', re.IGNORECASE),
+        'information_schema': re.compile(r'INFORMATION_SCHEMA', re.IGNORECASE),
+        'comment': re.compile(r'--\s*$|/\*.*?\*/', re.IGNORECASE),
+        'concat': re.compile(r'CONCAT\s*\(', re.IGNORECASE),
+        'group_concat': re.compile(r'GROUP_CONCAT\s*\(', re.IGNORECASE),
     }
     
     # XSS攻击模式
     XSS_PATTERNS = {
-        'script_tag': r'<script[^>]*>.*?</script>',
-        'javascript': r'javascript:',
-        'on_event': r'on\w+\s*=',
-        'eval': r'eval\s*\(',
-        'document_cookie': r'document\.cookie',
+        'script_tag': re.compile(r'<script[^>]*>.*?</script>'),
+        'javascript': re.compile(r'javascript:'),
+        'on_event': re.compile(r'on\w+\s*='),
+        'eval': re.compile(r'eval\s*\('),
+        'document_cookie': re.compile(r'document\.cookie'),
     }
     
     # 命令注入模式
     COMMAND_INJECTION_PATTERNS = {
-        'system': r'(?i)system\s*\(',
-        'exec': r'(?i)exec\s*\(',
-        'shell_exec': r'(?i)shell_exec\s*\(',
-        'backtick': r'`.*?`',
-        'pipe': r'\|.*?$',
+        'system': re.compile(r'system\s*\(', re.IGNORECASE),
+        'exec': re.compile(r'exec\s*\(', re.IGNORECASE),
+        'shell_exec': re.compile(r'shell_exec\s*\(', re.IGNORECASE),
+        'backtick': re.compile(r'`.*?`'),
+        'pipe': re.compile(r'\|.*?$'),
     }
     
     # 敏感信息模式
     SENSITIVE_PATTERNS = {
-        'phone': r'1[3-9]\d{9}',
-        'email': r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',
-        'ip': r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}',
-        'id_card': r'[1-9]\d{5}(19|20)\d{2}(0[1-9]|1[0-2])(0[1-9]|[12]\d|3[01])\d{3}[\dXx]',
+        'phone': re.compile(r'1[3-9]\d{9}'),
+        'email': re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'),
+        'ip': re.compile(r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}'),
+        'id_card': re.compile(r'[1-9]\d{5}(19|20)\d{2}(0[1-9]|1[0-2])(0[1-9]|[12]\d|3[01])\d{3}[\dXx]'),
     }
 
+def _combine_patterns(patterns: Dict[str, re.Pattern]) -> re.Pattern:
+    """将一组模式合并为一个带命名分组的交替模式，各模式的忽略大小写标志以局部标志保留"""
+    parts = []
+    for name, pattern in patterns.items():
+        body = f'(?i:{pattern.pattern})' if pattern.flags & re.IGNORECASE else pattern.pattern
+        parts.append(f'(?P<{name}>{body})')
+    return re.compile('|'.join(parts))
+
+# 每类模式合并后的预过滤模式
+SecurityPatterns.COMBINED_SQL_INJECTION = _combine_patterns(SecurityPatterns.SQL_INJECTION_PATTERNS)
+SecurityPatterns.COMBINED_XSS = _combine_patterns(SecurityPatterns.XSS_PATTERNS)
+SecurityPatterns.COMBINED_COMMAND_INJECTION = _combine_patterns(SecurityPatterns.COMMAND_INJECTION_PATTERNS)
+SecurityPatterns.COMBINED_SENSITIVE = _combine_patterns(SecurityPatterns.SENSITIVE_PATTERNS)
+
+# 脱敏使用的模式：邮箱排在手机号前，以手机号作用户名的邮箱按邮箱整体脱敏
+_PHONE_RE = SecurityPatterns.SENSITIVE_PATTERNS['phone']
+_EMAIL_RE = SecurityPatterns.SENSITIVE_PATTERNS['email']
+_IP_RE = SecurityPatterns.SENSITIVE_PATTERNS['ip']
+_DESENSITIZE_RE = _combine_patterns({'email': _EMAIL_RE, 'phone': _PHONE_RE, 'ip': _IP_RE})
+
+
+def _mask(m: re.Match) -> str:
+    """按命中的分组生成脱敏后的文本"""
+    value = m.group()
+    if m.lastgroup == 'phone':
+        return value[:3] + '****' + value[-4:]
+    if m.lastgroup == 'email':
+        return value[0] + '****' + value[value.index('@'):]
+    return value[:value.rindex('.')] + '.xxx'
+
 class SecurityDetector:
     """安全检测器类"""
     
     def __init__(self):
         self.patterns = SecurityPatterns()
+        
+        # 敏感信息批量扫描优先使用hyperscan（SIMD多模式匹配）
+        self._sensitive_db = self._build_hyperscan_db(self.patterns.SENSITIVE_PATTERNS) if hyperscan else None
     
-    def detect_sql_injection(self, text: str) -> Dict[str, List[str]]:
-        """检测SQL注入攻击
+    def _build_hyperscan_db(self, patterns: Dict[str, re.Pattern]):
+        """将一组模式编译为hyperscan数据库，模式ID为其在字典中的序号
+        
+        每个模式只需知道是否命中；按UTF-8与Unicode属性编译，使\\d等字符类与re一致。
+        """
+        flags = []
+        for pattern in patterns.values():
+            flag = hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+            if pattern.flags & re.IGNORECASE:
+                flag |= hyperscan.HS_FLAG_CASELESS
+            flags.append(flag)
+        db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        db.compile(
+            expressions=[p.pattern.encode() for p in patterns.values()],
+            ids=list(range(len(patterns))),
+            elements=len(patterns),
+            flags=flags
+        )
+        return db
+    
+    def _scan_hyperscan(self, db, patterns: Dict[str, re.Pattern], text: str) -> Dict[str, List[str]]:
+        """用hyperscan一次扫描确定哪些模式有命中，再只对这些模式用re提取匹配内容
+        
+        各模式的结果互相独立，与 _scan 完全一致；未命中的模式不再逐个扫描全文。
+        """
+        try:
+            data = text.encode('utf-8')
+        except UnicodeEncodeError:  # 含孤立代理字符，不是合法UTF-8
+            return self._scan(self.patterns.COMBINED_SENSITIVE, patterns, text)
+        
+        hit_ids = set()
+        db.scan(data, match_event_handler=lambda pattern_id, start, end, flags, context: hit_ids.add(pattern_id))
+        
+        results = {}
+        for pattern_id, (name, pattern) in enumerate(patterns.items()):
+            if pattern_id in hit_ids:
+                matches = [m.group() for m in pattern.finditer(text)]
+                if matches:
+                    results[name] = matches
+        return results
+    
+    def _scan(self, combined: re.Pattern, patterns: Dict[str, re.Pattern], text: str) -> Dict[str, List[str]]:
+        """按模式逐个扫描文本，合并后的模式仅用作预过滤
+        
+        大多数文本不含任何攻击特征，合并模式一次扫描即可确认并直接返回；
+        有命中时再逐个模式查找，不同模式之间的重叠匹配都会计入。
         
         Args:
+            combined: 合并后的模式
+            patterns: 原始模式字典
             text: 待检测文本
             
         Returns:
-            包含检测结果的字典，key为攻击类型，value为匹配到的内容列表
+            key为模式名称，value为匹配到的完整内容列表
         """
+        if combined.search(text) is None:
+            return {}
         results = {}
-        for pattern_name, pattern in self.patterns.SQL_INJECTION_PATTERNS.items():
-            matches = re.findall(pattern, text)
+        for name, pattern in patterns.items():
+            matches = [m.group() for m in pattern.finditer(text)]
             if matches:
-                results[pattern_name] = matches
+                results[name] = matches
         return results
     
+    def detect_sql_injection(self, text: str) -> Dict[str, List[str]]:
+        """检测SQL注入攻击
+        
+        Args:
+            text: 待检测文本
+            
+        Returns:
+            包含检测结果的字典，key为攻击类型，value为匹配到的内容列表
+        """
+        return self._scan(self.patterns.COMBINED_SQL_INJECTION, self.patterns.SQL_INJECTION_PATTERNS, text)
+    
     def detect_xss(self, text: str) -> Dict[str, List[str]]:
         """检测XSS攻击
         
@@ -74,12 +173,7 @@ class SecurityDetector:
         Returns:
             包含检测结果的字典，key为攻击类型，value为匹配到的内容列表
         """
-        results = {}
-        for pattern_name, pattern in self.patterns.XSS_PATTERNS.items():
-            matches = re.findall(pattern, text)
-            if matches:
-                results[pattern_name] = matches
-        return results
+        return self._scan(self.patterns.COMBINED_XSS, self.patterns.XSS_PATTERNS, text)
     
     def detect_command_injection(self, text: str) -> Dict[str, List[str]]:
         """检测命令注入攻击
@@ -90,12 +184,7 @@ class SecurityDetector:
         Returns:
             包含检测结果的字典，key为攻击类型，value为匹配到的内容列表
         """
-        results = {}
-        for pattern_name, pattern in self.patterns.COMMAND_INJECTION_PATTERNS.items():
-            matches = re.findall(pattern, text)
-            if matches:
-                results[pattern_name] = matches
-        return results
+        return self._scan(self.patterns.COMBINED_COMMAND_INJECTION, self.patterns.COMMAND_INJECTION_PATTERNS, text)
     
     def find_sensitive_info(self, text: str) -> Dict[str, List[str]]:
         """查找敏感信息
@@ -106,12 +195,9 @@ class SecurityDetector:
         Returns:
             包含检测结果的字典，key为敏感信息类型，value为匹配到的内容列表
         """
-        results = {}
-        for pattern_name, pattern in self.patterns.SENSITIVE_PATTERNS.items():
-            matches = re.findall(pattern, text)
-            if matches:
-                results[pattern_name] = matches
-        return results
+        if self._sensitive_db is not None:
+            return self._scan_hyperscan(self._sensitive_db, self.patterns.SENSITIVE_PATTERNS, text)
+        return self._scan(self.patterns.COMBINED_SENSITIVE, self.patterns.SENSITIVE_PATTERNS, text)
     
     def desensitize_text(self, text: str) -> str:
         """对文本中的敏感信息进行脱敏处理
@@ -122,47 +208,20 @@ class SecurityDetector:
         Returns:
             脱敏后的文本
         """
-        desensitized_text = text
-        
-        # 手机号脱敏
-        desensitized_text = re.sub(
-            self.patterns.SENSITIVE_PATTERNS['phone'],
-            lambda m: m.group(0)[:3] + '****' + m.group(0)[-4:],
-            desensitized_text
-        )
-        
-        # 邮箱脱敏
-        desensitized_text = re.sub(
-            self.patterns.SENSITIVE_PATTERNS['email'],
-            lambda m: m.group(0)[0] + '****' + m.group(0)[m.group(0).index('@'):],
-            desensitized_text
-        )
-        
-        # IP地址脱敏
-        desensitized_text = re.sub(
-            self.patterns.SENSITIVE_PATTERNS['ip'],
-            lambda m: m.group(0)[:m.group(0).rindex('.')] + '.xxx',
-            desensitized_text
-        )
-        
-        return desensitized_text 
+        # 手机号、邮箱、IP地址一次扫描完成脱敏
+        return _DESENSITIZE_RE.sub(_mask, text)
     
 
 # 使用示例
-f = open("http.log", 'r', encoding='utf-8')
-target_file = f.read()
-
-detector = SecurityDetector()
-sensitive_info = detector.find_sensitive_info(target_file)
-phone_counts = defaultdict(int)
-for phone in sensitive_info['phone']:
-    if phone in phone_counts:
-        phone_counts[phone] += 1
-    else:
-        phone_counts[phone] = 1
+# 日志文件映射进内存，用bytes版的手机号模式流式扫描，不整体读入（bytes模式下\d只匹配ASCII数字）
+phone_bytes_re = re.compile(SecurityPatterns.SENSITIVE_PATTERNS['phone'].pattern.encode())
+phone_counts = Counter()
+if os.path.getsize("http.log") > 0:  # 空文件无法mmap
+    with open("http.log", 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        phone_counts.update(m.group().decode() for m in phone_bytes_re.finditer(mm))
 
 # print(phone_counts)
-sorted_counts = sorted(phone_counts.items(), key=lambda x: x[1], reverse=True)
+sorted_counts = phone_counts.most_common()
 print(sorted_counts)
 # with open('sensitive_info_results.json', 'w', encoding='utf-8') as f:
 #     json.dump(sensitive_info, f, indent=2, ensure_ascii=False)